@@ -0,0 +1,425 @@
+"""
+In-memory stand-in for a RabbitMQ broker and the part of pika's BlockingConnection API the worker uses, so the real
+client, publisher pool and processing pipeline can be driven without a broker. Faults are injected from any thread:
+dropped connections, an outage refusing new connections and a blocked (resource alarm) state holding publishes.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque, Counter
+from dataclasses import dataclass
+
+from pika import BasicProperties, frame, spec
+from pika.exceptions import (AMQPConnectionError, ChannelClosedByBroker, ChannelWrongStateError,
+                             ConnectionBlockedTimeout, ConnectionWrongStateError, StreamLostError)
+
+# Deliveries dispatched per event loop pass, so timers still run while a deep queue is consumed
+MAX_DELIVERIES_PER_PASS = 100
+
+
+@dataclass
+class BrokerMessage:
+    body: bytes
+    properties: object
+    published_at: float
+    redelivered: bool = False
+
+
+@dataclass
+class _Timer:
+    callback: object
+    cancelled: bool = False
+
+
+class LocalBroker:
+    """Queues on the default exchange with manual acks, prefetch and publisher confirms, shared by all connections."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._queues = {}
+        self._connections = set()
+        self._down_until = 0.0
+        self._blocked_until = 0.0
+        self.connections_opened = 0
+        self.requeued = 0
+        self.published = Counter()
+        # (time, opened_at of the connection) of consumer registrations and acks, to measure recovery after faults
+        self.consumer_starts = []
+        self.acks = []
+
+    def connection_factory(self, parameters):
+        """Drop-in replacement of pika.BlockingConnection, retrying like it while the broker is down"""
+        for attempt in range(1, max(1, parameters.connection_attempts) + 1):
+            with self._condition:
+                if time.monotonic() >= self._down_until:
+                    connection = LocalBlockingConnection(self, parameters)
+                    self._connections.add(connection)
+                    self.connections_opened += 1
+                    return connection
+            if attempt < parameters.connection_attempts:
+                time.sleep(parameters.retry_delay)
+        raise AMQPConnectionError("Connection refused by the local broker")
+
+    def declare_queue(self, queue_name):
+        with self._condition:
+            return self._queues.setdefault(queue_name, deque())
+
+    def has_queue(self, queue_name):
+        with self._condition:
+            return queue_name in self._queues
+
+    def publish(self, queue_name, body, properties=None):
+        """Publish directly, bypassing connections and faults, like an upstream scraper on a healthy broker"""
+        with self._condition:
+            self._enqueue(queue_name, body, properties)
+
+    def _enqueue(self, queue_name, body, properties):
+        queue = self._queues.get(queue_name)
+        if queue is None:
+            # Unroutable on the default exchange, dropped like RabbitMQ does without the mandatory flag
+            return
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        queue.append(BrokerMessage(body, properties or BasicProperties(), time.monotonic()))
+        self.published[queue_name] += 1
+        self._condition.notify_all()
+
+    def _requeue(self, queue_name, message):
+        message.redelivered = True
+        self._queues[queue_name].appendleft(message)
+        self.requeued += 1
+        self._condition.notify_all()
+
+    def drain(self, queue_name):
+        """Remove and return every ready message of the queue"""
+        with self._condition:
+            queue = self._queues.get(queue_name, deque())
+            messages = list(queue)
+            queue.clear()
+            return messages
+
+    def queue_depth(self, queue_name):
+        with self._condition:
+            return len(self._queues.get(queue_name, ()))
+
+    def unacked_count(self):
+        with self._condition:
+            return sum(len(channel.unacked) for connection in self._connections for channel in connection.channels)
+
+    def drop_connections(self):
+        """Break every open connection like a network failure, their unacked messages are requeued"""
+        with self._condition:
+            for connection in list(self._connections):
+                self._lose(connection)
+
+    def outage(self, seconds):
+        """Drop every connection and refuse new ones for the given time, like a broker restart"""
+        with self._condition:
+            self._down_until = time.monotonic() + seconds
+            for connection in list(self._connections):
+                self._lose(connection)
+
+    def block(self, seconds):
+        """Hold every publish for the given time, like a memory or disk alarm"""
+        with self._condition:
+            self._blocked_until = time.monotonic() + seconds
+            self._condition.notify_all()
+
+    def _lose(self, connection):
+        connection.lost = True
+        self._release(connection)
+
+    def _release(self, connection):
+        self._connections.discard(connection)
+        for channel in connection.channels:
+            channel.release_unacked()
+        self._condition.notify_all()
+
+    def wait_unblocked(self, connection):
+        """Hold a publish while the broker is blocked, closing the connection after its blocked timeout"""
+        with self._condition:
+            blocked_since = time.monotonic()
+            while time.monotonic() < self._blocked_until:
+                connection.check_open()
+                if time.monotonic() - blocked_since > connection.parameters.blocked_connection_timeout:
+                    self._lose(connection)
+                    connection.closed = True
+                    raise ConnectionBlockedTimeout()
+                self._condition.wait(min(self._blocked_until - time.monotonic(), 0.1))
+
+    def wait(self, timeout):
+        with self._condition:
+            self._condition.wait(timeout)
+
+
+class LocalBlockingConnection:
+    def __init__(self, broker, parameters):
+        self.broker = broker
+        self.parameters = parameters
+        self.opened_at = time.monotonic()
+        self.channels = []
+        self.closed = False
+        # Set by the broker from any thread, noticed by the next operation like a broken socket
+        self.lost = False
+        self._channel_numbers = itertools.count(1)
+        self._timers = []
+        self._timer_sequence = itertools.count()
+        self._threadsafe_callbacks = deque()
+        self._dispatching = False
+
+    @property
+    def is_closed(self):
+        return self.closed
+
+    @property
+    def is_open(self):
+        return not self.closed
+
+    def check_open(self):
+        if self.lost and not self.closed:
+            self.closed = True
+            raise StreamLostError("Stream connection lost: connection dropped by the local broker")
+        if self.closed:
+            raise ConnectionWrongStateError("Connection is closed")
+
+    def channel(self):
+        self.check_open()
+        channel = LocalChannel(self, next(self._channel_numbers))
+        with self.broker._condition:
+            self.channels.append(channel)
+        return channel
+
+    def close(self):
+        if self.closed:
+            raise ConnectionWrongStateError("Connection is already closed")
+        self.closed = True
+        with self.broker._condition:
+            self.broker._release(self)
+
+    def call_later(self, delay, callback):
+        timer = _Timer(callback)
+        heapq.heappush(self._timers, (time.monotonic() + delay, next(self._timer_sequence), timer))
+        return timer
+
+    def remove_timeout(self, timeout_id):
+        timeout_id.cancelled = True
+
+    def add_callback_threadsafe(self, callback):
+        self._threadsafe_callbacks.append(callback)
+        with self.broker._condition:
+            self.broker._condition.notify_all()
+
+    def process_data_events(self, time_limit=0):
+        """Run due timers, threadsafe callbacks and deliveries, waiting up to time_limit (None: forever) for any"""
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        while True:
+            self.check_open()
+            if self._dispatching:
+                # Like pika, callbacks are not dispatched from within a callback
+                return
+            if self._dispatch():
+                return
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return
+            timeout = 0.1
+            if self._timers:
+                timeout = min(timeout, max(self._timers[0][0] - now, 0))
+            if deadline is not None:
+                timeout = min(timeout, deadline - now)
+            self.broker.wait(timeout)
+
+    def sleep(self, duration):
+        """Like pika's sleep, keeps processing (and checking) the connection instead of blocking in time.sleep"""
+        deadline = time.monotonic() + duration
+        while True:
+            self.process_data_events(0)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self.broker.wait(min(0.1, remaining))
+
+    def _dispatch(self):
+        self._dispatching = True
+        try:
+            dispatched = False
+            while self._threadsafe_callbacks:
+                self._threadsafe_callbacks.popleft()()
+                dispatched = True
+            while self._timers and self._timers[0][0] <= time.monotonic():
+                _, _, timer = heapq.heappop(self._timers)
+                if not timer.cancelled:
+                    timer.callback()
+                    dispatched = True
+            for _ in range(MAX_DELIVERIES_PER_PASS):
+                self.check_open()
+                delivery = next(filter(None, (channel.next_delivery() for channel in list(self.channels))), None)
+                if delivery is None:
+                    break
+                callback, channel, method, properties, body = delivery
+                callback(channel, method, properties, body)
+                dispatched = True
+            return dispatched
+        finally:
+            self._dispatching = False
+
+
+class LocalChannel:
+    def __init__(self, connection, channel_number):
+        self.connection = connection
+        self.broker = connection.broker
+        self.channel_number = channel_number
+        self.closed = False
+        self.prefetch_count = 0
+        self.unacked = {}
+        self._delivery_tags = itertools.count(1)
+        self._consumer_tags = itertools.count(1)
+        self._consumers = {}
+        self._consuming = False
+
+    @property
+    def is_closed(self):
+        return self.closed or self.connection.is_closed
+
+    @property
+    def is_open(self):
+        return not self.is_closed
+
+    def _check(self):
+        self.connection.check_open()
+        if self.closed:
+            raise ChannelWrongStateError("Channel is closed.")
+
+    def _fail(self, reply_code, reply_text):
+        self.closed = True
+        with self.broker._condition:
+            self.release_unacked()
+        raise ChannelClosedByBroker(reply_code, reply_text)
+
+    def release_unacked(self):
+        """Requeue the unacked messages, called with the broker lock held"""
+        for queue_name, message in reversed(list(self.unacked.values())):
+            self.broker._requeue(queue_name, message)
+        self.unacked.clear()
+        self._consumers.clear()
+
+    def close(self):
+        self._check()
+        self.closed = True
+        with self.broker._condition:
+            self.release_unacked()
+
+    def confirm_delivery(self):
+        self._check()
+
+    def queue_declare(self, queue, passive=False, durable=False, exclusive=False, auto_delete=False, arguments=None):
+        self._check()
+        if passive and not self.broker.has_queue(queue):
+            self._fail(404, f"NOT_FOUND - no queue '{queue}'")
+        self.broker.declare_queue(queue)
+        with self.broker._condition:
+            consumers = sum(1 for connection in self.broker._connections for channel in connection.channels
+                            for consumer_queue, _ in channel._consumers.values() if consumer_queue == queue)
+            message_count = len(self.broker._queues[queue])
+        return frame.Method(self.channel_number, spec.Queue.DeclareOk(queue, message_count, consumers))
+
+    def basic_qos(self, prefetch_size=0, prefetch_count=0, global_qos=False):
+        self._check()
+        self.prefetch_count = prefetch_count
+
+    def basic_publish(self, exchange, routing_key, body, properties=None, mandatory=False):
+        self._check()
+        # Publisher confirms make blocking publishes wait for the broker
+        self.broker.wait_unblocked(self.connection)
+        with self.broker._condition:
+            self.connection.check_open()
+            self.broker._enqueue(routing_key, body, properties)
+
+    def basic_consume(self, queue, on_message_callback, auto_ack=False, exclusive=False, consumer_tag=None,
+                      arguments=None):
+        self._check()
+        if not self.broker.has_queue(queue):
+            self._fail(404, f"NOT_FOUND - no queue '{queue}'")
+        consumer_tag = consumer_tag or f"ctag{self.channel_number}.{next(self._consumer_tags)}"
+        with self.broker._condition:
+            self._consumers[consumer_tag] = (queue, on_message_callback)
+            self.broker.consumer_starts.append((time.monotonic(), self.connection.opened_at))
+        return consumer_tag
+
+    def basic_cancel(self, consumer_tag=''):
+        self._check()
+        with self.broker._condition:
+            self._consumers.pop(consumer_tag, None)
+
+    def next_delivery(self):
+        """Take the next message for a consumer of this channel within the prefetch, or None"""
+        with self.broker._condition:
+            if self.is_closed or not self._consumers:
+                return None
+            if self.prefetch_count and len(self.unacked) >= self.prefetch_count:
+                return None
+            for consumer_tag, (queue_name, callback) in self._consumers.items():
+                queue = self.broker._queues[queue_name]
+                if queue:
+                    message = queue.popleft()
+                    delivery_tag = next(self._delivery_tags)
+                    self.unacked[delivery_tag] = (queue_name, message)
+                    method = spec.Basic.Deliver(consumer_tag, delivery_tag, message.redelivered, '', queue_name)
+                    return callback, self, method, message.properties, message.body
+        return None
+
+    def _settle(self, delivery_tag, multiple):
+        if multiple:
+            tags = [tag for tag in self.unacked if tag <= delivery_tag]
+        elif delivery_tag in self.unacked:
+            tags = [delivery_tag]
+        else:
+            self._fail(406, f"PRECONDITION_FAILED - unknown delivery tag {delivery_tag}")
+        return [self.unacked.pop(tag) for tag in tags]
+
+    def basic_ack(self, delivery_tag=0, multiple=False):
+        self._check()
+        with self.broker._condition:
+            settled = self._settle(delivery_tag, multiple)
+            now = time.monotonic()
+            self.broker.acks.extend((now, self.connection.opened_at) for _ in settled)
+
+    def basic_nack(self, delivery_tag=0, multiple=False, requeue=True):
+        self._check()
+        with self.broker._condition:
+            for queue_name, message in reversed(self._settle(delivery_tag, multiple)):
+                if requeue:
+                    self.broker._requeue(queue_name, message)
+
+    def basic_get(self, queue, auto_ack=False):
+        self._check()
+        with self.broker._condition:
+            messages = self.broker._queues.get(queue)
+            if not messages:
+                return None, None, None
+            message = messages.popleft()
+            delivery_tag = next(self._delivery_tags)
+            if not auto_ack:
+                self.unacked[delivery_tag] = (queue, message)
+            method = spec.Basic.GetOk(delivery_tag, message.redelivered, '', queue, len(messages))
+        return method, message.properties, message.body
+
+    def start_consuming(self):
+        """Dispatch deliveries and timers until stop_consuming or all consumers are cancelled"""
+        self._consuming = True
+        try:
+            while True:
+                # A dropped connection surfaces here, like a broken socket in pika's I/O loop
+                self.connection.check_open()
+                if not self._consuming or not self._consumers:
+                    return
+                self.connection.process_data_events(time_limit=None)
+        finally:
+            self._consuming = False
+
+    def stop_consuming(self, consumer_tag=None):
+        with self.broker._condition:
+            self._consumers.clear()
+        self._consuming = False
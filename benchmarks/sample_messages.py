@@ -0,0 +1,76 @@
+"""
+Synthetic Ukrainian Telegram posts that mimic the scraper output: opportunity announcements decorated with emojis,
+links, hashtags, mentions, channel signatures and irregular whitespace.
+"""
+
+import random
+from datetime import datetime, timezone
+
+OPPORTUNITIES = [
+    ("вебінар", "Запрошуємо на безкоштовний вебінар «Як скласти резюме, яке помітять рекрутери»."),
+    ("грант", "Відкрито прийом заявок на грант для молодіжних ініціатив у громадах до 50 000 грн."),
+    ("конкурс", "Стартує всеукраїнський конкурс студентських наукових робіт з екології та енергетики."),
+    ("курс", "Новий курс з аналізу даних на Python для початківців, заняття двічі на тиждень."),
+    ("стажування", "Оплачуване стажування в IT-компанії для студентів 3-4 курсів технічних спеціальностей."),
+    ("волонтерство", "Шукаємо волонтерів для допомоги у сортуванні гуманітарної допомоги на складі."),
+    ("хакатон", "48-годинний хакатон для розробників, дизайнерів та менеджерів продуктів, призовий фонд 100 000 грн."),
+    ("тренінг", "Дводенний тренінг з публічних виступів та лідерства для активної молоді."),
+    ("стипендія", "Стипендійна програма для магістрантів, які навчаються за кордоном."),
+    ("табір", "Літній мовний табір у Карпатах для підлітків 14-17 років."),
+    ("конференція", "Щорічна конференція з кібербезпеки збирає експертів із державного та приватного секторів."),
+    ("майстер-клас", "Практичний майстер-клас з UX-дизайну від провідних дизайнерів країни."),
+]
+DETAILS = [
+    "Формат: онлайн, посилання надійде після реєстрації.",
+    "Місце проведення: Київ, вул. Хрещатик, 1.",
+    "Кількість місць обмежена, поспішайте!!!",
+    "Реєстрація триває до кінця тижня, терміново заповнюйте форму.",
+    "Участь безкоштовна, сертифікат учасника гарантовано.",
+    "Детальні умови участі та вимоги до кандидатів дивіться у формі.",
+]
+EMOJIS = ["🔥", "🚀", "📢", "✅", "👉", "💡", "📅", "🎓", "⚡️", "❗️", "🇺🇦", "1️⃣", "▪️"]
+LINKS = ["https://forms.gle/{token}", "https://bit.ly/{token}", "t.me/{channel}/{number}", "www.example.org/{token}"]
+CHANNELS = ["uopp_news", "students_ua", "grants_ukraine", "it_jobs_kyiv", "volunteer_hub"]
+SIGNATURES = ["Підписуйтесь на @{channel}", "➡️ Більше можливостей: @{channel}", "—\n{channel} | можливості для молоді"]
+
+
+def _decorate(rng, sentence):
+    if rng.random() < 0.6:
+        sentence = f"{rng.choice(EMOJIS)} {sentence}"
+    if rng.random() < 0.3:
+        sentence = f"{sentence} {rng.choice(EMOJIS) * rng.randint(1, 3)}"
+    return sentence
+
+
+def generate_message_text(rng):
+    """Generate one synthetic opportunity post."""
+    category, headline = rng.choice(OPPORTUNITIES)
+    channel = rng.choice(CHANNELS)
+    token = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz0123456789') for _ in range(8))
+
+    lines = [_decorate(rng, headline).upper() if rng.random() < 0.2 else _decorate(rng, headline)]
+    lines.extend(_decorate(rng, detail) for detail in rng.sample(DETAILS, rng.randint(1, 4)))
+    lines.append(f"Реєстрація: {rng.choice(LINKS).format(token=token, channel=channel, number=rng.randint(1, 9999))}")
+    lines.append(' '.join(f"#{tag}" for tag in [category, "можливості", "молодь"][:rng.randint(1, 3)]))
+    lines.append(rng.choice(SIGNATURES).format(channel=channel))
+
+    separator = rng.choice(["\n", "\n\n", "\n \n\n", "  \n"])
+    return separator.join(lines).replace(" ", "  ", rng.randint(0, 3)) + "\u200b" * rng.randint(0, 2)
+
+
+def generate_message_texts(count, seed=42):
+    """Generate a reproducible list of synthetic opportunity posts."""
+    rng = random.Random(seed)
+    return [generate_message_text(rng) for _ in range(count)]
+
+
+def generate_raw_message(rng, post_creation_time):
+    """Generate one scraper message (RawMessageData JSON fields) with a synthetic post."""
+    channel_id = rng.randrange(len(CHANNELS))
+    return {
+        "post_creation_time": post_creation_time.isoformat(),
+        "scrapped_creation_time": datetime.now(timezone.utc).isoformat(),
+        "channel_id": 1000 + channel_id,
+        "channel_name": CHANNELS[channel_id],
+        "message_text": generate_message_text(rng)
+    }
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the text normalization stage: token-count reduction and per-stage latency on raw vs normalized text.
+
+Run from the repository root:
+    python -m benchmarks.text_normalization_benchmark --messages 200 [--generate]
+
+Stages whose dependencies or models are not available locally are skipped.
+"""
+
+import argparse
+import re
+import statistics
+import time
+
+from benchmarks.sample_messages import generate_message_texts
+from config import (SPACY_MODEL, HUGGING_FACE_MODEL, HUGGING_FACE_MODEL_TASK, HUGGING_FACE_MODEL_MAX_TOKEN_LENGTH)
+from service.text_normalization_service import DefaultTextNormalizationService, NORMALIZATION_STEPS
+
+_WORD_OR_SYMBOL_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+
+def timed(function, texts):
+    """Run the function on every text, return the results and per-call latencies in milliseconds."""
+    results, latencies = [], []
+    for text in texts:
+        started = time.perf_counter()
+        results.append(function(text))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return results, latencies
+
+
+def p95(values):
+    return statistics.quantiles(values, n=20)[-1] if len(values) > 1 else values[0]
+
+
+def print_row(name, raw_values, normalized_values, unit):
+    raw_total, normalized_total = sum(raw_values), sum(normalized_values)
+    reduction = (1 - normalized_total / raw_total) * 100 if raw_total else 0.0
+    print(f"{name:<28} {statistics.mean(raw_values):>10.2f} {statistics.mean(normalized_values):>12.2f} "
+          f"{p95(raw_values):>10.2f} {p95(normalized_values):>12.2f} {reduction:>9.1f}%  {unit}")
+
+
+def load_spacy():
+    try:
+        import spacy
+        return spacy.load(SPACY_MODEL)
+    except (ImportError, OSError) as e:
+        print(f"Skipping spaCy stage: {e}")
+        return None
+
+
+def load_pipeline():
+    try:
+        from transformers import pipeline
+        return pipeline(HUGGING_FACE_MODEL_TASK, model=HUGGING_FACE_MODEL,
+                        max_length=HUGGING_FACE_MODEL_MAX_TOKEN_LENGTH)
+    except Exception as e:
+        print(f"Skipping Hugging Face stages: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the text normalization stage.")
+    parser.add_argument("--messages", type=int, default=200, help="number of synthetic messages")
+    parser.add_argument("--generate", action="store_true", help="also time BART generation (slow)")
+    args = parser.parse_args()
+
+    raw_texts = generate_message_texts(args.messages)
+    normalizer = DefaultTextNormalizationService(list(NORMALIZATION_STEPS))
+    normalized_texts, normalization_latencies = timed(normalizer.normalize, raw_texts)
+
+    print(f"Messages: {len(raw_texts)}, steps: {normalizer.steps}")
+    print(f"Normalization latency: mean {statistics.mean(normalization_latencies):.3f} ms, "
+          f"p95 {p95(normalization_latencies):.3f} ms")
+    print()
+    print(f"{'metric':<28} {'raw mean':>10} {'norm. mean':>12} {'raw p95':>10} {'norm. p95':>12} {'reduction':>10}")
+
+    print_row("characters", [len(t) for t in raw_texts], [len(t) for t in normalized_texts], "chars")
+    print_row("word/symbol tokens", [len(_WORD_OR_SYMBOL_PATTERN.findall(t)) for t in raw_texts],
+              [len(_WORD_OR_SYMBOL_PATTERN.findall(t)) for t in normalized_texts], "tokens")
+
+    nlp = load_spacy()
+    if nlp is not None:
+        raw_docs, raw_latencies = timed(nlp, raw_texts)
+        normalized_docs, normalized_latencies = timed(nlp, normalized_texts)
+        print_row("spaCy tokens", [len(doc) for doc in raw_docs], [len(doc) for doc in normalized_docs], "tokens")
+        print_row("spaCy pipeline latency", raw_latencies, normalized_latencies, "ms")
+
+    pipeline_bart = load_pipeline()
+    if pipeline_bart is not None:
+        tokenizer = pipeline_bart.tokenizer
+        print_row("BART input tokens", [len(tokenizer(t)['input_ids']) for t in raw_texts],
+                  [len(tokenizer(t)['input_ids']) for t in normalized_texts], "tokens")
+        if args.generate:
+            _, raw_latencies = timed(pipeline_bart, raw_texts)
+            _, normalized_latencies = timed(pipeline_bart, normalized_texts)
+            print_row("BART generation latency", raw_latencies, normalized_latencies, "ms")
+
+
+if __name__ == "__main__":
+    main()
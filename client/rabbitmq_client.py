@@ -1,16 +1,56 @@
 import logging
 import time
 import ssl
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
 
 import pika
-from pika.exceptions import AMQPConnectionError, AMQPChannelError, ConnectionClosedByBroker
+from pika.exceptions import AMQPConnectionError, ConnectionClosedByBroker, AMQPError
+
+from client.rabbitmq_publisher_pool import DefaultPublisherPool
 
 logger = logging.getLogger(__name__)
 
 
+RETRY_COUNT_HEADER = 'x-retry-count'
+DELIVERY_COUNT_HEADER = 'x-delivery-count'
+ORIGINAL_QUEUE_HEADER = 'x-original-queue'
+ERROR_HEADER = 'x-error'
+ERROR_TYPE_HEADER = 'x-error-type'
+FAILED_AT_HEADER = 'x-failed-at'
+DELIVERY_ATTEMPTS_HEADER = 'x-delivery-attempts'
+MAX_ERROR_HEADER_LENGTH = 1000
+
+# A batch is acknowledged only once its publishes are confirmed, give up retrying one so the batch is requeued instead
+PUBLISH_MAX_RETRY_SECONDS = 20
+
+
+class MalformedMessageError(Exception):
+    """The message can never be processed (e.g. invalid JSON), it is dead-lettered without retries."""
+
+
+class PublishError(Exception):
+    """Publishing the output failed, the message is requeued without using up a delivery attempt."""
+
+
+@dataclass
+class _PendingDelivery:
+    channel: object
+    method: object
+    properties: object
+    body: bytes
+    attempt: int
+    received_at: float
+
+
 class DefaultRabbitMQClient:
-    def __init__(self, queue_name, delivery_mode, host, port, username, password, max_retries, retry_delay, use_ssl=False, virtual_host='/'):
+    def __init__(self, queue_name, delivery_mode, host, port, username, password, max_retries, retry_delay, use_ssl=False, virtual_host='/',
+                 dead_letter_queue_name=None, max_delivery_attempts=3, publisher_pool_size=1,
+                 connection_factory=pika.BlockingConnection):
         self.queue_name = queue_name
+        self.dead_letter_queue_name = dead_letter_queue_name
+        self.max_delivery_attempts = max_delivery_attempts
         self.delivery_mode = delivery_mode
         self.credentials = pika.PlainCredentials(username, password)
         
@@ -47,28 +87,55 @@ class DefaultRabbitMQClient:
         
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        # Creates blocking connections from the parameters, replaceable by a local broker stand-in for load tests
+        self.connection_factory = connection_factory
 
+        # The connection and channel are only used for consuming and acknowledging, publishing goes through the pool
         self.connection = None
         self.channel = None
-        self.declared_queues = {}
+        self.publisher_pool = DefaultPublisherPool(self.parameters, publisher_pool_size, max_retries, retry_delay,
+                                                   connection_factory, PUBLISH_MAX_RETRY_SECONDS)
         self.consumer_tag = None
         self._running = False
 
+        # Consumer registration, replayed on every new channel after a reconnect
+        self._consumer_queue_name = None
+        self._consumer_callback = None
+        self._consumer_channel = None
+        self._prefetch_count = 1
+
+        # Batch consumption state, see register_batch_consumer
+        self.batch_controller = None
+        self._batch_handler = None
+        self._pending_deliveries = []
+        self._batch_timer = None
+        # Batches run on a single processing thread, the consuming thread keeps serving heartbeats meanwhile
+        self._batch_executor = None
+        self._batches_in_flight = 0
+        # Retried and dead-lettered copies being published, the original is settled once the copy is confirmed
+        self._republishes_in_flight = 0
+        self._draining = False
+
+        # Periodic callbacks run on the consuming thread, scheduled on each new connection
+        self._periodic_callbacks = []
+        self._periodic_connection = None
+
+        # Conditions checked after every processed batch, the first reason returned stops the consumer
+        self._stop_conditions = []
+        self.stop_reason = None
+
     def setup_connection(self):
         """Setup connection with automatic retry logic"""
         retry_count = 0
         while retry_count < self.max_retries:
             try:
                 if self.connection and not self.connection.is_closed:
-                    self.close_connection()
+                    self._close_consume_connection()
                 
                 logger.info(f"Attempting to connect to RabbitMQ at {self.parameters.host}:{self.parameters.port} (SSL: {hasattr(self.parameters, 'ssl_options')})")
-                self.connection = pika.BlockingConnection(self.parameters)
+                self.connection = self.connection_factory(self.parameters)
                 self.channel = self.connection.channel()
                 
-                # Enable publisher confirms for reliable message delivery
-                self.channel.confirm_delivery()
-                
                 logger.info("RabbitMQ setup completed successfully.")
                 return True
                 
@@ -86,7 +153,13 @@ class DefaultRabbitMQClient:
         return False
 
     def close_connection(self):
-        """Close connection gracefully"""
+        """Stop the batch processing thread and close the consuming and publishing connections gracefully"""
+        if self._batch_executor is not None:
+            self._batch_executor.shutdown(wait=True, cancel_futures=True)
+        self._close_consume_connection()
+        self.publisher_pool.close()
+
+    def _close_consume_connection(self):
         try:
             if self.channel and not self.channel.is_closed:
                 self.channel.close()
@@ -103,76 +176,329 @@ class DefaultRabbitMQClient:
             if not self.setup_connection():
                 raise AMQPConnectionError("Failed to reconnect to RabbitMQ")
 
-    def produce_message(self, message, queue_name):
-        """Produce message with automatic reconnection"""
-        retry_count = 0
-        while retry_count <= self.max_retries:
+    def produce_message(self, message, queue_name, headers=None, content_encoding=None):
+        """Produce message on a publisher connection, independent of the consuming connection"""
+        return self.produce_message_async(message, queue_name, headers, content_encoding).result()
+
+    def produce_message_async(self, message, queue_name, headers=None, content_encoding=None):
+        """Queue the message for a publisher thread, returns a Future resolving to whether it was confirmed"""
+        properties = pika.BasicProperties(delivery_mode=self.delivery_mode, headers=headers,
+                                          content_encoding=content_encoding)
+        return self.publisher_pool.publish_async(message, queue_name, properties)
+
+    def _delivery_attempt(self, method, properties):
+        """
+        Return which delivery attempt this is: the failed attempts counted in the retry header, plus the earlier
+        deliveries of this copy counted by quorum queues (e.g. the worker died while processing it). The redelivered
+        flag is not counted, prefetched messages requeued by a reconnect or a worker recycle carry it too.
+        """
+        headers = properties.headers or {}
+        return int(headers.get(RETRY_COUNT_HEADER, 0)) + int(headers.get(DELIVERY_COUNT_HEADER, 0)) + 1
+
+    def _handle_failed_delivery(self, method, properties, body, queue_name, attempt, error):
+        """
+        Retry the failed message at the tail of the queue or dead-letter it once the attempts are exhausted.
+        Broker and publish failures say nothing about the message, it is requeued without counting the attempt;
+        malformed messages can never succeed and are dead-lettered right away.
+        """
+        if isinstance(error, (PublishError, AMQPError)):
+            logger.warning(f"Message failed on a broker or publish error, requeueing it without counting the attempt: "
+                           f"{error}")
+            self.channel.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+            return
+        malformed = isinstance(error, MalformedMessageError)
+        if not self.dead_letter_queue_name:
+            if malformed:
+                logger.error(f"Dropping malformed message, no dead-letter queue is configured: {error}")
+            self.channel.basic_nack(delivery_tag=method.delivery_tag, requeue=not malformed)
+            return
+
+        headers = dict(properties.headers or {})
+        # The broker's count belongs to the delivered copy, the republished copy carries the total in the retry header
+        headers.pop(DELIVERY_COUNT_HEADER, None)
+        if malformed or attempt >= self.max_delivery_attempts:
+            headers.update({
+                ORIGINAL_QUEUE_HEADER: queue_name,
+                ERROR_HEADER: str(error)[:MAX_ERROR_HEADER_LENGTH],
+                ERROR_TYPE_HEADER: type(error).__name__,
+                FAILED_AT_HEADER: datetime.now(timezone.utc).isoformat(),
+                DELIVERY_ATTEMPTS_HEADER: attempt
+            })
+            target_queue = self.dead_letter_queue_name
+            reason = "is malformed" if malformed else f"failed {attempt} delivery attempts"
+            logger.error(f"Message {reason}, moving it to dead-letter queue '{target_queue}'.")
+        else:
+            headers[RETRY_COUNT_HEADER] = attempt
+            target_queue = queue_name
+            logger.warning(f"Message failed delivery attempt {attempt}/{self.max_delivery_attempts}, requeueing it for retry.")
+
+        # The original is settled on the consuming thread once the copy is confirmed, it keeps consuming meanwhile
+        channel, connection = self.channel, self.connection
+        self._republishes_in_flight += 1
+        future = self.produce_message_async(body, target_queue, headers, properties.content_encoding)
+
+        def on_published(future):
             try:
-                self._ensure_connection()
-                
-                if queue_name not in self.declared_queues:
-                    self.channel.queue_declare(queue=queue_name, durable=True)
-                    self.declared_queues[queue_name] = True
-                    logger.info("Queue declared successfully.")
-                
-                self.channel.basic_publish(
-                    exchange='',
-                    routing_key=queue_name,
-                    body=message,
-                    properties=pika.BasicProperties(
-                        delivery_mode=self.delivery_mode,
-                    )
-                )
-                logger.info("Message produced successfully.")
-                return True
-                
-            except (AMQPConnectionError, AMQPChannelError, ConnectionClosedByBroker) as e:
-                logger.error(f"Error producing message: {e}")
-                retry_count += 1
-                if retry_count <= self.max_retries:
-                    time.sleep(self.retry_delay)
-                    # Clear declared queues to force redeclaration on reconnect
-                    self.declared_queues = {}
-                else:
-                    logger.error("Maximum retry limit reached, message could not be produced.")
-                    break
+                connection.add_callback_threadsafe(
+                    lambda: self._settle_republished(channel, method.delivery_tag, future.result()))
             except Exception as e:
-                logger.error(f"Unexpected error producing message: {e}")
-                break
-        return False
+                logger.warning(f"Connection lost while republishing a failed message, it will be redelivered: {e}")
+        future.add_done_callback(on_published)
+
+    def _settle_republished(self, channel, delivery_tag, published):
+        # Delivery tags are only valid on the consuming channel the message came from, which a reconnect replaces
+        if channel is not self.channel:
+            return
+        self._republishes_in_flight -= 1
+        if not channel.is_closed:
+            if published:
+                channel.basic_ack(delivery_tag=delivery_tag)
+            else:
+                channel.basic_nack(delivery_tag=delivery_tag, requeue=True)
+        self._finish_drain_if_idle()
 
     def register_message_consumer(self, handler, queue_name):
         """Register message consumer with enhanced error handling"""
         def on_message(channel, method, properties, body):
             logger.info(f"Consumed message from '{queue_name}': {body}")
+            attempt = self._delivery_attempt(method, properties)
             try:
                 handler(body)
                 # Manually acknowledge the message for better control
                 if not self.channel.is_closed:
                     self.channel.basic_ack(delivery_tag=method.delivery_tag)
             except Exception as e:
-                logger.error(f"Error consuming message: {e}")
-                # Negative acknowledge the message on error
+                logger.error(f"Error consuming message (attempt {attempt}): {e}")
+                # Retry or dead-letter the message instead of requeueing it forever
                 if not self.channel.is_closed:
-                    self.channel.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+                    self._handle_failed_delivery(method, properties, body, queue_name, attempt, e)
+            self._check_stop_conditions(1)
+
+        self._register_consumer(on_message, queue_name, prefetch_count=1)
+
+    def register_batch_consumer(self, batch_handler, queue_name, batch_controller):
+        """
+        Register a consumer that processes deliveries in batches. A batch is handed over when it reaches the
+        controller's batch size or its oldest delivery has waited max_batch_wait seconds. The batch handler gets
+        the message bodies and returns one entry per message: None to acknowledge it, or the exception it failed with.
+        The handler runs on a single processing thread, one batch at a time; the consuming thread keeps the connection
+        alive meanwhile and acknowledges each batch once it is handed back.
+        """
+        self.batch_controller = batch_controller
+        self._batch_handler = batch_handler
+        if self._batch_executor is None:
+            self._batch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-processor")
+
+        def on_message(channel, method, properties, body):
+            if self._draining:
+                # Left unacknowledged, the broker requeues it when the channel closes
+                return
+            logger.info(f"Consumed message from '{queue_name}': {body}")
+            self._pending_deliveries.append(_PendingDelivery(
+                channel, method, properties, body, self._delivery_attempt(method, properties), time.monotonic()))
+            if len(self._pending_deliveries) >= self.batch_controller.batch_size:
+                self._flush_batch()
+            elif self._batch_timer is None:
+                self._batch_timer = self.connection.call_later(self.batch_controller.max_batch_wait,
+                                                               self._on_batch_timer)
+
+        self._register_consumer(on_message, queue_name, prefetch_count=batch_controller.prefetch_count)
 
+    def _register_consumer(self, on_message, queue_name, prefetch_count):
+        self._consumer_callback = on_message
+        self._consumer_queue_name = queue_name
+        self._prefetch_count = prefetch_count
         try:
             self._ensure_connection()
-            
-            # Set QoS for better message distribution
-            self.channel.basic_qos(prefetch_count=1)
-            
-            self.consumer_tag = self.channel.basic_consume(
-                queue=queue_name,
-                on_message_callback=on_message,
-                auto_ack=False  # Manual acknowledgment for better control
-            )
-            logger.info(f"Registered message handler and started consumer for queue {queue_name}.")
-            
+            self._start_consumer()
         except Exception as e:
             logger.error(f"Failed to register message consumer: {e}")
             raise
 
+    def _start_consumer(self):
+        """Start the registered consumer on the current channel"""
+        # Deliveries of a previous channel are requeued by the broker when it closes
+        self._pending_deliveries = []
+        self._batch_timer = None
+        self._batches_in_flight = 0
+        self._republishes_in_flight = 0
+
+        # Set QoS for better message distribution
+        self.channel.basic_qos(prefetch_count=self._prefetch_count)
+
+        self.consumer_tag = self.channel.basic_consume(
+            queue=self._consumer_queue_name,
+            on_message_callback=self._consumer_callback,
+            auto_ack=False  # Manual acknowledgment for better control
+        )
+        self._consumer_channel = self.channel
+        logger.info(f"Registered message handler and started consumer for queue {self._consumer_queue_name}.")
+
+    def _on_batch_timer(self):
+        self._batch_timer = None
+        self._flush_batch()
+
+    def _flush_batch(self):
+        """Hand the pending deliveries over to the processing thread as one batch"""
+        if self._batch_timer is not None:
+            self.connection.remove_timeout(self._batch_timer)
+            self._batch_timer = None
+        deliveries, self._pending_deliveries = self._pending_deliveries, []
+        if not deliveries:
+            return
+
+        self._batches_in_flight += 1
+        self._batch_executor.submit(self._process_batch, self.connection, deliveries)
+
+    def _process_batch(self, connection, deliveries):
+        """Run the batch handler on the processing thread and hand the results back to the consuming thread"""
+        channel = deliveries[0].channel
+        if channel.is_closed:
+            logger.warning(f"Channel closed before processing a batch of {len(deliveries)} messages, "
+                           f"they will be redelivered.")
+            return
+
+        started = time.monotonic()
+        try:
+            errors = self._batch_handler([delivery.body for delivery in deliveries])
+        except Exception as e:
+            errors = [e] * len(deliveries)
+        duration = time.monotonic() - started
+
+        try:
+            # Channels are not thread-safe, acknowledgements are sent from the consuming thread
+            connection.add_callback_threadsafe(lambda: self._complete_batch(channel, deliveries, errors, duration))
+        except Exception as e:
+            logger.warning(f"Connection lost while processing a batch of {len(deliveries)} messages, "
+                           f"they will be redelivered: {e}")
+
+    def _complete_batch(self, channel, deliveries, errors, duration):
+        """Acknowledge, retry or dead-letter each delivery of a processed batch, on the consuming thread"""
+        if channel is not self.channel:
+            # The batch belongs to a channel a reconnect replaced, its deliveries are redelivered on the new one
+            return
+        self._batches_in_flight -= 1
+
+        for delivery, error in zip(deliveries, errors):
+            if channel.is_closed:
+                break
+            if error is None:
+                channel.basic_ack(delivery_tag=delivery.method.delivery_tag)
+            else:
+                logger.error(f"Error consuming message (attempt {delivery.attempt}): {error}")
+                self._handle_failed_delivery(delivery.method, delivery.properties, delivery.body,
+                                             self._consumer_queue_name, delivery.attempt, error)
+
+        finished = time.monotonic()
+        self.batch_controller.record_batch(len(deliveries), duration,
+                                           [finished - delivery.received_at for delivery in deliveries])
+        logger.info(f"Processed batch of {len(deliveries)} messages in {duration:.2f}s.")
+        self._check_stop_conditions(len(deliveries))
+        self._finish_drain_if_idle()
+
+    def add_stop_condition(self, condition):
+        """
+        Stop consuming once the condition asks for it. It is called after every processed batch with the number of
+        messages in it, and returns the reason to stop or None.
+        """
+        self._stop_conditions.append(condition)
+
+    def _check_stop_conditions(self, message_count):
+        if self.stop_reason:
+            return
+        for condition in self._stop_conditions:
+            try:
+                reason = condition(message_count)
+            except Exception as e:
+                logger.error(f"Error in stop condition {getattr(condition, '__name__', condition)}: {e}")
+                continue
+            if reason:
+                self.drain_and_stop(reason)
+                return
+
+    def drain_and_stop(self, reason):
+        """Stop taking new deliveries, process and acknowledge the ones in flight and stop consuming"""
+        logger.warning(f"Stopping message consumption: {reason}")
+        self.stop_reason = reason
+        self._running = False
+        if self.channel is None or self.channel.is_closed:
+            return
+        # Prefetched deliveries that were never handed over are requeued by the broker when the channel closes
+        self._draining = True
+        if self._batch_executor is not None:
+            self._flush_batch()
+        self._finish_drain_if_idle()
+
+    def _finish_drain_if_idle(self):
+        """
+        Cancel the consumer and stop consuming once no batch or republish is in flight. The consumer is only cancelled
+        now since start_consuming returns as soon as no consumer is left, before the acknowledgements are handed back.
+        """
+        if not self._draining or self._batches_in_flight or self._republishes_in_flight:
+            return
+        if not self.consumer_tag or self.channel.is_closed:
+            return
+        self.channel.basic_cancel(self.consumer_tag)
+        self.consumer_tag = None
+        self.channel.stop_consuming()
+
+    def adjust_batching(self):
+        """Feed the raw queue depth to the batch controller and apply the prefetch it decides on"""
+        if self.batch_controller is None:
+            return
+        queue_depth = self.get_queue_depth(self._consumer_queue_name)
+        if self.batch_controller.adjust(queue_depth):
+            self._prefetch_count = self.batch_controller.prefetch_count
+            self.channel.basic_qos(prefetch_count=self._prefetch_count)
+            logger.info(f"Prefetch count set to {self._prefetch_count}.")
+
+    def get_queue_depth(self, queue_name):
+        """Return the number of ready messages in the queue using a passive declare"""
+        self._ensure_connection()
+        return self.channel.queue_declare(queue=queue_name, passive=True).method.message_count
+
+    def add_periodic_callback(self, interval, callback, between_batches=False):
+        """
+        Run the callback every interval seconds on the consuming thread while consuming. With between_batches it runs
+        on the processing thread instead, between two batches, for callbacks that touch state the batch handler uses.
+        """
+        self._periodic_callbacks.append((interval, callback, between_batches))
+
+    def _run_periodic_callback(self, callback):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Error in periodic callback {getattr(callback, '__name__', callback)}: {e}")
+
+    def _schedule_periodic_callbacks(self):
+        if self._periodic_connection is self.connection:
+            return
+        self._periodic_connection = connection = self.connection
+
+        def schedule(interval, callback, between_batches):
+            def run():
+                if connection is not self.connection or connection.is_closed:
+                    return
+                if between_batches and self._batch_executor is not None:
+                    self._batch_executor.submit(self._run_periodic_callback, callback)
+                else:
+                    self._run_periodic_callback(callback)
+                if not connection.is_closed:
+                    connection.call_later(interval, run)
+            connection.call_later(interval, run)
+
+        for interval, callback, between_batches in self._periodic_callbacks:
+            schedule(interval, callback, between_batches)
+
+    def get_message(self, queue_name):
+        """Get a single message without consuming from the queue, returns (method, properties, body) or Nones"""
+        self._ensure_connection()
+        return self.channel.basic_get(queue=queue_name, auto_ack=False)
+
+    def ack_message(self, delivery_tag):
+        """Acknowledge a message received with get_message"""
+        self.channel.basic_ack(delivery_tag=delivery_tag)
+
     def start_consuming(self):
         """Start consuming messages with automatic reconnection - runs continuously until explicitly stopped"""
         self._running = True
@@ -188,6 +514,11 @@ class DefaultRabbitMQClient:
                 
                 # Reset consecutive failures on successful connection
                 consecutive_failures = 0
+
+                # A reconnect replaces the channel, the consumer has to be started again on the new one
+                if self._consumer_callback and self._consumer_channel is not self.channel:
+                    self._start_consumer()
+                self._schedule_periodic_callbacks()
                 
                 # Start consuming - this will block until connection is lost or stopped
                 self.channel.start_consuming()
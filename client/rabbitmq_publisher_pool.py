@@ -0,0 +1,174 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import pika
+from pika.exceptions import AMQPConnectionError, AMQPChannelError, ConnectionClosedByBroker, NackError
+
+logger = logging.getLogger(__name__)
+
+# Idle publisher threads process their connection's heartbeats at this interval, well within the 30 second timeout
+KEEPALIVE_INTERVAL = 10
+
+
+class _PooledPublisher:
+    """A publishing connection with one confirmed channel and the queues already declared on that channel."""
+
+    def __init__(self, parameters, number, connection_factory=pika.BlockingConnection):
+        self.parameters = parameters
+        self.number = number
+        self.connection_factory = connection_factory
+        self.connection = None
+        self.channel = None
+        self.declared_queues = set()
+
+    def ensure_channel(self):
+        if self.connection is None or self.connection.is_closed:
+            logger.info(f"Opening publisher connection #{self.number}.")
+            self.connection = self.connection_factory(self.parameters)
+            self.channel = None
+        if self.channel is None or self.channel.is_closed:
+            self.channel = self.connection.channel()
+            # Enable publisher confirms for reliable message delivery
+            self.channel.confirm_delivery()
+            # Declarations are cached per channel
+            self.declared_queues = set()
+        return self.channel
+
+    def publish(self, body, queue_name, properties):
+        channel = self.ensure_channel()
+        if queue_name not in self.declared_queues:
+            channel.queue_declare(queue=queue_name, durable=True)
+            self.declared_queues.add(queue_name)
+            logger.info(f"Queue '{queue_name}' declared successfully.")
+        channel.basic_publish(exchange='', routing_key=queue_name, body=body, properties=properties)
+
+    def reset_channel(self):
+        try:
+            if self.channel and not self.channel.is_closed:
+                self.channel.close()
+        except Exception as e:
+            logger.warning(f"Error closing publisher channel #{self.number}: {e}")
+        self.channel = None
+
+    def reset_connection(self):
+        self.reset_channel()
+        try:
+            if self.connection and not self.connection.is_closed:
+                self.connection.close()
+        except Exception as e:
+            logger.warning(f"Error closing publisher connection #{self.number}: {e}")
+        self.connection = None
+
+    def keepalive(self):
+        # Blocking connections only send heartbeats while processing I/O
+        if self.connection and not self.connection.is_closed:
+            self.connection.process_data_events(time_limit=0)
+
+
+class DefaultPublisherPool:
+    """
+    Publisher threads, each owning one publishing connection separate from the consuming connection, so that
+    waiting for publisher confirms or losing a publishing channel doesn't affect consumption. Publishes are queued
+    and taken by the first idle thread, so up to size publishes wait for their confirms in parallel. Connections are
+    opened lazily and re-created on failure; idle threads keep their connection's heartbeats going. Retries give up
+    after max_retry_seconds.
+    """
+
+    def __init__(self, parameters, size, max_retries, retry_delay, connection_factory=pika.BlockingConnection,
+                 max_retry_seconds=None):
+        self.parameters = parameters
+        self.size = max(1, size)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.connection_factory = connection_factory
+        self.max_retry_seconds = max_retry_seconds
+        self._jobs = None
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def publish_async(self, body, queue_name, properties):
+        """Queue a publish, returns a Future resolving to whether it was confirmed"""
+        future = Future()
+        with self._lock:
+            if not self._threads:
+                self._start_threads()
+            self._jobs.put((future, body, queue_name, properties))
+        return future
+
+    def publish(self, body, queue_name, properties):
+        """Publish with confirms and automatic channel/connection re-creation, returns whether it succeeded"""
+        return self.publish_async(body, queue_name, properties).result()
+
+    def _start_threads(self):
+        # Every start gets its own queue, so the stop markers of close() only reach the threads they were meant for
+        self._jobs = jobs = queue.Queue()
+        for number in range(1, self.size + 1):
+            publisher = _PooledPublisher(self.parameters, number, self.connection_factory)
+            thread = threading.Thread(target=self._run, args=(publisher, jobs), name=f"publisher-{number}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self, publisher, jobs):
+        while True:
+            try:
+                job = jobs.get(timeout=KEEPALIVE_INTERVAL)
+            except queue.Empty:
+                self._keepalive(publisher)
+                continue
+            if job is None:
+                break
+            future, body, queue_name, properties = job
+            if future.set_running_or_notify_cancel():
+                future.set_result(self._publish(publisher, body, queue_name, properties))
+        publisher.reset_connection()
+
+    def _publish(self, publisher, body, queue_name, properties):
+        started = time.monotonic()
+        retry_count = 0
+        while retry_count <= self.max_retries:
+            try:
+                publisher.publish(body, queue_name, properties)
+                logger.info("Message produced successfully.")
+                return True
+            except (AMQPConnectionError, ConnectionClosedByBroker) as e:
+                logger.error(f"Error producing message, publisher connection #{publisher.number} lost: {e}")
+                publisher.reset_connection()
+            except AMQPChannelError as e:
+                logger.error(f"Error producing message, publisher channel #{publisher.number} closed: {e}")
+                publisher.reset_channel()
+            except NackError as e:
+                logger.error(f"Message was rejected by the broker: {e}")
+            except Exception as e:
+                logger.error(f"Unexpected error producing message: {e}")
+                return False
+
+            retry_count += 1
+            if retry_count > self.max_retries:
+                break
+            if self.max_retry_seconds is not None and \
+                    time.monotonic() - started + self.retry_delay >= self.max_retry_seconds:
+                logger.error(f"Giving up producing message after {time.monotonic() - started:.1f}s.")
+                return False
+            time.sleep(self.retry_delay)
+        logger.error("Maximum retry limit reached, message could not be produced.")
+        return False
+
+    def _keepalive(self, publisher):
+        try:
+            publisher.keepalive()
+        except Exception as e:
+            logger.warning(f"Publisher connection #{publisher.number} failed its keepalive: {e}")
+            publisher.reset_connection()
+
+    def close(self):
+        """Publish what is queued, then stop the threads and close their connections; the next publish restarts them"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            for _ in threads:
+                self._jobs.put(None)
+        for thread in threads:
+            thread.join()
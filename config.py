@@ -1,6 +1,7 @@
 import os
 import logging
 import sys
+import tempfile
 from urllib.parse import urlparse
 
 from dotenv import load_dotenv
@@ -45,6 +46,29 @@ def get_optional_int_env_var(name: str, default: int) -> int:
         print(f"Warning: Environment variable '{name}' must be an integer, using default {default}")
         return default
 
+def get_optional_float_env_var(name: str, default: float) -> float:
+    """Get optional float environment variable with default."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"Warning: Environment variable '{name}' must be a number, using default {default}")
+        return default
+
+def get_optional_bool_env_var(name: str, default: bool) -> bool:
+    """Get optional boolean environment variable (true/false, 1/0, yes/no) with default."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    if value.strip().lower() in ('true', '1', 'yes', 'on'):
+        return True
+    if value.strip().lower() in ('false', '0', 'no', 'off'):
+        return False
+    print(f"Warning: Environment variable '{name}' must be a boolean, using default {default}")
+    return default
+
 def parse_rabbitmq_url(url: str) -> dict:
     """Parse RabbitMQ URL (AMQP or AMQPS) and return connection parameters."""
     try:
@@ -96,29 +120,113 @@ RABBIT_VIRTUAL_HOST = None
 RABBIT_USE_SSL = None
 RABBIT_MAX_RETRIES = None
 RABBIT_RETRY_DELAY = None
+RABBIT_DEAD_LETTER_QUEUE_NAME = None
+RABBIT_MAX_DELIVERY_ATTEMPTS = None
+RABBIT_PUBLISHER_POOL_SIZE = None
 LOG_LEVEL = None
+DUPLICATE_DETECTION_ENABLED = None
+DUPLICATE_SIMILARITY_THRESHOLD = None
+DUPLICATE_WINDOW_SECONDS = None
+DUPLICATE_MAX_ENTRIES = None
+TEXT_NORMALIZATION_ENABLED = None
+TEXT_NORMALIZATION_STEPS = None
+PROCESSING_MODE = None
+WORKER_ROLE = None
+RABBIT_ENRICHMENT_QUEUE_NAME = None
+ADAPTIVE_BATCHING_ENABLED = None
+BATCH_SIZE_MIN = None
+BATCH_SIZE_MAX = None
+BATCH_MAX_WAIT_MS = None
+PREFETCH_COUNT_MAX = None
+TARGET_P95_LATENCY_SECONDS = None
+BATCH_CONTROLLER_INTERVAL_SECONDS = None
+PROCESSED_OUTPUT_FORMAT = None
+ENVELOPE_MAX_RECORDS = None
+ENVELOPE_MAX_BYTES = None
+ENVELOPE_COMPRESSION = None
+MEMORY_RSS_LIMIT_MB = None
+MAX_MESSAGES_PER_WORKER = None
+MEMORY_SAMPLE_INTERVAL_SECONDS = None
+PROFILER_TOKEN = None
+CANDIDATES_FILE = None
+CANDIDATES_RELOAD_INTERVAL_SECONDS = None
+LEMMA_CACHE_DIR = None
+CATEGORY_ENGINE = None
+CATEGORY_EMBEDDING_THRESHOLD = None
+KEYPHRASE_GENERATION_ENABLED = None
+TITLE_DECODER_PROMPT = None
+KEYPHRASE_DECODER_PROMPT = None
+IDEMPOTENCY_ENABLED = None
+IDEMPOTENCY_DB_PATH = None
+IDEMPOTENCY_TTL_SECONDS = None
+IDEMPOTENCY_DUPLICATE_ACTION = None
 
 # Model and extractor configurations
 SPACY_MODEL = "uk_core_news_sm"
 HUGGING_FACE_MODEL = "beogradjanka/bart_multitask_finetuned_for_title_and_keyphrase_generation"
 HUGGING_FACE_MODEL_TASK = "text2text-generation"
 HUGGING_FACE_MODEL_MAX_TOKEN_LENGTH = 20
+KEYPHRASE_MAX_TOKEN_LENGTH = 32
 
 TITLE_LABEL = "title"
 CATEGORIES_LABEL = "categories"
 FORMAT_LABEL = "format"
 ASAP_LABEL = "asap"
+KEYPHRASES_LABEL = "keyphrases"
 
 CATEGORIES_CANDIDATES = ["вебінар", "волонтерство", "грант", "конкурс", "конференція", "курс", "лекція",
                      "майстер-клас", "хакатон", "обмін", "вакансія", "проєкт", "стажування",
                      "стипендія", "табір", "турнір", "тренінг"]
 ASAP_CANDIDATES = ["asap", "терміново"]
 
+# Processing modes and worker roles
+SINGLE_PHASE_MODE = "single"
+TWO_PHASE_MODE = "two_phase"
+PROCESSOR_WORKER_ROLE = "processor"
+ENRICHMENT_WORKER_ROLE = "enrichment"
+
+# Output formats of the processed queue
+MESSAGE_OUTPUT_FORMAT = "message"
+ENVELOPE_OUTPUT_FORMAT = "envelope"
+ENVELOPE_COMPRESSIONS = ("zstd", "gzip", "none")
+
+# Category engines: exact lemma matching, embedding similarity, or the union of both
+LEMMA_CATEGORY_ENGINE = "lemma"
+EMBEDDING_CATEGORY_ENGINE = "embedding"
+COMBINED_CATEGORY_ENGINE = "combined"
+CATEGORY_ENGINES = (LEMMA_CATEGORY_ENGINE, EMBEDDING_CATEGORY_ENGINE, COMBINED_CATEGORY_ENGINE)
+
+# Handling of redelivered messages that were already processed: ack without output or republish the stored result
+ACK_DUPLICATE_ACTION = "ack"
+REPUBLISH_DUPLICATE_ACTION = "republish"
+IDEMPOTENCY_DUPLICATE_ACTIONS = (ACK_DUPLICATE_ACTION, REPUBLISH_DUPLICATE_ACTION)
+IDEMPOTENCY_PURGE_INTERVAL_SECONDS = 600
+
+# Exit code of a worker recycled for crossing its memory or message limit, so the platform restarts it
+WORKER_RECYCLE_EXIT_CODE = 75
+
+# Near-duplicate detection (MinHash + LSH) configurations
+DUPLICATE_MINHASH_PERMUTATIONS = 128
+DUPLICATE_LSH_BANDS = 32
+DUPLICATE_SHINGLE_SIZE = 5
+
 def load_config():
     """Load configuration from environment variables."""
     global RABBIT_URL, RABBIT_RAW_QUEUE_NAME, RABBIT_PROCESSED_QUEUE_NAME
     global RABBIT_DELIVERY_MODE, RABBIT_HOST, RABBIT_PORT, RABBIT_USERNAME, RABBIT_PASSWORD
     global RABBIT_VIRTUAL_HOST, RABBIT_USE_SSL, RABBIT_MAX_RETRIES, RABBIT_RETRY_DELAY, LOG_LEVEL
+    global RABBIT_DEAD_LETTER_QUEUE_NAME, RABBIT_MAX_DELIVERY_ATTEMPTS, RABBIT_PUBLISHER_POOL_SIZE
+    global DUPLICATE_DETECTION_ENABLED, DUPLICATE_SIMILARITY_THRESHOLD, DUPLICATE_WINDOW_SECONDS, DUPLICATE_MAX_ENTRIES
+    global TEXT_NORMALIZATION_ENABLED, TEXT_NORMALIZATION_STEPS
+    global PROCESSING_MODE, WORKER_ROLE, RABBIT_ENRICHMENT_QUEUE_NAME
+    global ADAPTIVE_BATCHING_ENABLED, BATCH_SIZE_MIN, BATCH_SIZE_MAX, BATCH_MAX_WAIT_MS, PREFETCH_COUNT_MAX
+    global TARGET_P95_LATENCY_SECONDS, BATCH_CONTROLLER_INTERVAL_SECONDS
+    global PROCESSED_OUTPUT_FORMAT, ENVELOPE_MAX_RECORDS, ENVELOPE_MAX_BYTES, ENVELOPE_COMPRESSION
+    global MEMORY_RSS_LIMIT_MB, MAX_MESSAGES_PER_WORKER, MEMORY_SAMPLE_INTERVAL_SECONDS, PROFILER_TOKEN
+    global CANDIDATES_FILE, CANDIDATES_RELOAD_INTERVAL_SECONDS, LEMMA_CACHE_DIR
+    global CATEGORY_ENGINE, CATEGORY_EMBEDDING_THRESHOLD, SPACY_MODEL
+    global KEYPHRASE_GENERATION_ENABLED, TITLE_DECODER_PROMPT, KEYPHRASE_DECODER_PROMPT
+    global IDEMPOTENCY_ENABLED, IDEMPOTENCY_DB_PATH, IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_DUPLICATE_ACTION
     
     print("Loading configuration from environment variables...")
     print(f"RAILWAY_ENVIRONMENT: {os.environ.get('RAILWAY_ENVIRONMENT', 'Not set')}")
@@ -145,6 +253,38 @@ def load_config():
     RABBIT_DELIVERY_MODE = get_optional_int_env_var("RABBIT_DELIVERY_MODE", 2)
     RABBIT_MAX_RETRIES = get_optional_int_env_var("RABBIT_MAX_RETRIES", 5)
     RABBIT_RETRY_DELAY = get_optional_int_env_var("RABBIT_RETRY_DELAY", 5)
+    RABBIT_DEAD_LETTER_QUEUE_NAME = get_optional_env_var("RABBIT_DEAD_LETTER_QUEUE_NAME",
+                                                         f"{RABBIT_RAW_QUEUE_NAME}_dead_letter")
+    RABBIT_MAX_DELIVERY_ATTEMPTS = get_optional_int_env_var("RABBIT_MAX_DELIVERY_ATTEMPTS", 3)
+    RABBIT_PUBLISHER_POOL_SIZE = get_optional_int_env_var("RABBIT_PUBLISHER_POOL_SIZE", 1)
+    RABBIT_ENRICHMENT_QUEUE_NAME = get_optional_env_var("RABBIT_ENRICHMENT_QUEUE_NAME",
+                                                        f"{RABBIT_RAW_QUEUE_NAME}_enrichment")
+
+    # Processing mode and worker role
+    PROCESSING_MODE = get_optional_env_var("PROCESSING_MODE", SINGLE_PHASE_MODE).lower()
+    if PROCESSING_MODE not in (SINGLE_PHASE_MODE, TWO_PHASE_MODE):
+        print(f"Error: PROCESSING_MODE must be '{SINGLE_PHASE_MODE}' or '{TWO_PHASE_MODE}', got '{PROCESSING_MODE}'")
+        sys.exit(1)
+    WORKER_ROLE = get_optional_env_var("WORKER_ROLE", PROCESSOR_WORKER_ROLE).lower()
+    if WORKER_ROLE not in (PROCESSOR_WORKER_ROLE, ENRICHMENT_WORKER_ROLE):
+        print(f"Error: WORKER_ROLE must be '{PROCESSOR_WORKER_ROLE}' or '{ENRICHMENT_WORKER_ROLE}', got '{WORKER_ROLE}'")
+        sys.exit(1)
+    if WORKER_ROLE == ENRICHMENT_WORKER_ROLE and PROCESSING_MODE != TWO_PHASE_MODE:
+        # Otherwise the enrichment worker would silently run as a second full processor on the raw queue
+        print(f"Error: WORKER_ROLE '{ENRICHMENT_WORKER_ROLE}' requires PROCESSING_MODE '{TWO_PHASE_MODE}'")
+        sys.exit(1)
+
+    # Processed queue output format
+    PROCESSED_OUTPUT_FORMAT = get_optional_env_var("PROCESSED_OUTPUT_FORMAT", MESSAGE_OUTPUT_FORMAT).lower()
+    if PROCESSED_OUTPUT_FORMAT not in (MESSAGE_OUTPUT_FORMAT, ENVELOPE_OUTPUT_FORMAT):
+        print(f"Error: PROCESSED_OUTPUT_FORMAT must be '{MESSAGE_OUTPUT_FORMAT}' or '{ENVELOPE_OUTPUT_FORMAT}', "
+              f"got '{PROCESSED_OUTPUT_FORMAT}'")
+        sys.exit(1)
+    ENVELOPE_MAX_BYTES = get_optional_int_env_var("ENVELOPE_MAX_BYTES", 1048576)
+    ENVELOPE_COMPRESSION = get_optional_env_var("ENVELOPE_COMPRESSION", "zstd").lower()
+    if ENVELOPE_COMPRESSION not in ENVELOPE_COMPRESSIONS:
+        print(f"Error: ENVELOPE_COMPRESSION must be one of {', '.join(ENVELOPE_COMPRESSIONS)}, got '{ENVELOPE_COMPRESSION}'")
+        sys.exit(1)
 
     # Parse RabbitMQ URL (AMQP or AMQPS)
     print("Parsing RabbitMQ URL...")
@@ -167,6 +307,80 @@ def load_config():
 
     # Logging configs
     LOG_LEVEL = get_optional_env_var("LOG_LEVEL", "INFO").upper()
+
+    # Debug endpoints of the health server, localhost-only without a token
+    PROFILER_TOKEN = get_optional_env_var("PROFILER_TOKEN") or None
+
+    # Batching and adaptive controller configs
+    ADAPTIVE_BATCHING_ENABLED = get_optional_bool_env_var("ADAPTIVE_BATCHING_ENABLED", True)
+    BATCH_SIZE_MIN = get_optional_int_env_var("BATCH_SIZE_MIN", 1)
+    BATCH_SIZE_MAX = get_optional_int_env_var("BATCH_SIZE_MAX", 16)
+    BATCH_MAX_WAIT_MS = get_optional_int_env_var("BATCH_MAX_WAIT_MS", 200)
+    PREFETCH_COUNT_MAX = get_optional_int_env_var("PREFETCH_COUNT_MAX", 64)
+    TARGET_P95_LATENCY_SECONDS = get_optional_float_env_var("TARGET_P95_LATENCY_SECONDS", 30.0)
+    BATCH_CONTROLLER_INTERVAL_SECONDS = get_optional_int_env_var("BATCH_CONTROLLER_INTERVAL_SECONDS", 15)
+    # Envelopes are flushed at the end of every consumer batch, so they never hold more records than a batch
+    ENVELOPE_MAX_RECORDS = get_optional_int_env_var("ENVELOPE_MAX_RECORDS", BATCH_SIZE_MAX)
+    if ENVELOPE_MAX_RECORDS > BATCH_SIZE_MAX:
+        print(f"Warning: ENVELOPE_MAX_RECORDS ({ENVELOPE_MAX_RECORDS}) can't be reached, envelopes are flushed at the "
+              f"end of every batch of at most BATCH_SIZE_MAX ({BATCH_SIZE_MAX}) messages")
+
+    # Worker recycling configs, 0 disables a limit
+    MEMORY_RSS_LIMIT_MB = get_optional_int_env_var("MEMORY_RSS_LIMIT_MB", 0)
+    MAX_MESSAGES_PER_WORKER = get_optional_int_env_var("MAX_MESSAGES_PER_WORKER", 0)
+    MEMORY_SAMPLE_INTERVAL_SECONDS = get_optional_int_env_var("MEMORY_SAMPLE_INTERVAL_SECONDS", 60)
+
+    # Candidate lists, the file overrides CATEGORIES_CANDIDATES and ASAP_CANDIDATES and is reloaded on edits
+    CANDIDATES_FILE = get_optional_env_var("CANDIDATES_FILE") or None
+    CANDIDATES_RELOAD_INTERVAL_SECONDS = get_optional_int_env_var("CANDIDATES_RELOAD_INTERVAL_SECONDS", 30)
+    LEMMA_CACHE_DIR = get_optional_env_var("LEMMA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "uopp_lemma_tables"))
+
+    # Title and keyphrase generation configs, the decoder prompts select the task of the multitask model
+    KEYPHRASE_GENERATION_ENABLED = get_optional_bool_env_var("KEYPHRASE_GENERATION_ENABLED", False)
+    TITLE_DECODER_PROMPT = get_optional_env_var("TITLE_DECODER_PROMPT", "")
+    KEYPHRASE_DECODER_PROMPT = get_optional_env_var("KEYPHRASE_DECODER_PROMPT")
+    if KEYPHRASE_GENERATION_ENABLED and not KEYPHRASE_DECODER_PROMPT:
+        # The prompt has to be the one the model was trained with, a guessed one silently yields a second title
+        print("Error: KEYPHRASE_GENERATION_ENABLED requires KEYPHRASE_DECODER_PROMPT, the decoder prompt the model "
+              "was trained to generate keyphrases from")
+        sys.exit(1)
+
+    # Category engine configs
+    # The embedding engines need a model with static word vectors, e.g. uk_core_news_lg
+    SPACY_MODEL = get_optional_env_var("SPACY_MODEL", "uk_core_news_sm")
+    CATEGORY_ENGINE = get_optional_env_var("CATEGORY_ENGINE", LEMMA_CATEGORY_ENGINE).lower()
+    if CATEGORY_ENGINE not in CATEGORY_ENGINES:
+        print(f"Error: CATEGORY_ENGINE must be one of {', '.join(CATEGORY_ENGINES)}, got '{CATEGORY_ENGINE}'")
+        sys.exit(1)
+    CATEGORY_EMBEDDING_THRESHOLD = get_optional_float_env_var("CATEGORY_EMBEDDING_THRESHOLD", None)
+    if CATEGORY_ENGINE != LEMMA_CATEGORY_ENGINE and CATEGORY_EMBEDDING_THRESHOLD is None:
+        # Similarities depend on the spaCy model's vectors, there is no threshold that fits every model
+        print(f"Error: CATEGORY_ENGINE '{CATEGORY_ENGINE}' requires CATEGORY_EMBEDDING_THRESHOLD, calibrated for the "
+              f"spaCy model '{SPACY_MODEL}'")
+        sys.exit(1)
+
+    # Idempotency store configs
+    IDEMPOTENCY_ENABLED = get_optional_bool_env_var("IDEMPOTENCY_ENABLED", False)
+    IDEMPOTENCY_DB_PATH = get_optional_env_var("IDEMPOTENCY_DB_PATH",
+                                               os.path.join(tempfile.gettempdir(), "uopp_idempotency.sqlite3"))
+    IDEMPOTENCY_TTL_SECONDS = get_optional_int_env_var("IDEMPOTENCY_TTL_SECONDS", 86400)
+    IDEMPOTENCY_DUPLICATE_ACTION = get_optional_env_var("IDEMPOTENCY_DUPLICATE_ACTION", ACK_DUPLICATE_ACTION).lower()
+    if IDEMPOTENCY_DUPLICATE_ACTION not in IDEMPOTENCY_DUPLICATE_ACTIONS:
+        print(f"Error: IDEMPOTENCY_DUPLICATE_ACTION must be one of {', '.join(IDEMPOTENCY_DUPLICATE_ACTIONS)}, "
+              f"got '{IDEMPOTENCY_DUPLICATE_ACTION}'")
+        sys.exit(1)
+
+    # Near-duplicate detection configs
+    DUPLICATE_DETECTION_ENABLED = get_optional_bool_env_var("DUPLICATE_DETECTION_ENABLED", False)
+    DUPLICATE_SIMILARITY_THRESHOLD = get_optional_float_env_var("DUPLICATE_SIMILARITY_THRESHOLD", 0.85)
+    DUPLICATE_WINDOW_SECONDS = get_optional_int_env_var("DUPLICATE_WINDOW_SECONDS", 86400)
+    DUPLICATE_MAX_ENTRIES = get_optional_int_env_var("DUPLICATE_MAX_ENTRIES", 10000)
+
+    # Text normalization configs
+    TEXT_NORMALIZATION_ENABLED = get_optional_bool_env_var("TEXT_NORMALIZATION_ENABLED", False)
+    TEXT_NORMALIZATION_STEPS = [step.strip() for step in get_optional_env_var(
+        "TEXT_NORMALIZATION_STEPS", "urls,mentions,hashtags,emojis,formatting,punctuation,whitespace").split(',')
+        if step.strip()]
     
     print("Configuration loaded successfully!")
     print(f"Using defaults for optional variables:")
@@ -174,3 +388,43 @@ def load_config():
     print(f"  RABBIT_DELIVERY_MODE: {RABBIT_DELIVERY_MODE}")
     print(f"  RABBIT_MAX_RETRIES: {RABBIT_MAX_RETRIES}")
     print(f"  RABBIT_RETRY_DELAY: {RABBIT_RETRY_DELAY}")
+    print(f"  RABBIT_DEAD_LETTER_QUEUE_NAME: {RABBIT_DEAD_LETTER_QUEUE_NAME}")
+    print(f"  RABBIT_MAX_DELIVERY_ATTEMPTS: {RABBIT_MAX_DELIVERY_ATTEMPTS}")
+    print(f"  RABBIT_PUBLISHER_POOL_SIZE: {RABBIT_PUBLISHER_POOL_SIZE}")
+    print(f"  RABBIT_ENRICHMENT_QUEUE_NAME: {RABBIT_ENRICHMENT_QUEUE_NAME}")
+    print(f"  PROCESSING_MODE: {PROCESSING_MODE}")
+    print(f"  WORKER_ROLE: {WORKER_ROLE}")
+    print(f"  PROCESSED_OUTPUT_FORMAT: {PROCESSED_OUTPUT_FORMAT}")
+    print(f"  ENVELOPE_MAX_RECORDS: {ENVELOPE_MAX_RECORDS}")
+    print(f"  ENVELOPE_MAX_BYTES: {ENVELOPE_MAX_BYTES}")
+    print(f"  ENVELOPE_COMPRESSION: {ENVELOPE_COMPRESSION}")
+    print(f"  ADAPTIVE_BATCHING_ENABLED: {ADAPTIVE_BATCHING_ENABLED}")
+    print(f"  BATCH_SIZE_MIN: {BATCH_SIZE_MIN}")
+    print(f"  BATCH_SIZE_MAX: {BATCH_SIZE_MAX}")
+    print(f"  BATCH_MAX_WAIT_MS: {BATCH_MAX_WAIT_MS}")
+    print(f"  PREFETCH_COUNT_MAX: {PREFETCH_COUNT_MAX}")
+    print(f"  TARGET_P95_LATENCY_SECONDS: {TARGET_P95_LATENCY_SECONDS}")
+    print(f"  BATCH_CONTROLLER_INTERVAL_SECONDS: {BATCH_CONTROLLER_INTERVAL_SECONDS}")
+    print(f"  MEMORY_RSS_LIMIT_MB: {MEMORY_RSS_LIMIT_MB}")
+    print(f"  MAX_MESSAGES_PER_WORKER: {MAX_MESSAGES_PER_WORKER}")
+    print(f"  MEMORY_SAMPLE_INTERVAL_SECONDS: {MEMORY_SAMPLE_INTERVAL_SECONDS}")
+    print(f"  CANDIDATES_FILE: {CANDIDATES_FILE}")
+    print(f"  KEYPHRASE_GENERATION_ENABLED: {KEYPHRASE_GENERATION_ENABLED}")
+    print(f"  TITLE_DECODER_PROMPT: {TITLE_DECODER_PROMPT!r}")
+    print(f"  KEYPHRASE_DECODER_PROMPT: {KEYPHRASE_DECODER_PROMPT!r}")
+    print(f"  SPACY_MODEL: {SPACY_MODEL}")
+    print(f"  CATEGORY_ENGINE: {CATEGORY_ENGINE}")
+    print(f"  CATEGORY_EMBEDDING_THRESHOLD: {CATEGORY_EMBEDDING_THRESHOLD}")
+    print(f"  CANDIDATES_RELOAD_INTERVAL_SECONDS: {CANDIDATES_RELOAD_INTERVAL_SECONDS}")
+    print(f"  LEMMA_CACHE_DIR: {LEMMA_CACHE_DIR}")
+    print(f"  PROFILER_TOKEN: {'set' if PROFILER_TOKEN else 'not set (debug endpoints are localhost-only)'}")
+    print(f"  IDEMPOTENCY_ENABLED: {IDEMPOTENCY_ENABLED}")
+    print(f"  IDEMPOTENCY_DB_PATH: {IDEMPOTENCY_DB_PATH}")
+    print(f"  IDEMPOTENCY_TTL_SECONDS: {IDEMPOTENCY_TTL_SECONDS}")
+    print(f"  IDEMPOTENCY_DUPLICATE_ACTION: {IDEMPOTENCY_DUPLICATE_ACTION}")
+    print(f"  DUPLICATE_DETECTION_ENABLED: {DUPLICATE_DETECTION_ENABLED}")
+    print(f"  DUPLICATE_SIMILARITY_THRESHOLD: {DUPLICATE_SIMILARITY_THRESHOLD}")
+    print(f"  DUPLICATE_WINDOW_SECONDS: {DUPLICATE_WINDOW_SECONDS}")
+    print(f"  DUPLICATE_MAX_ENTRIES: {DUPLICATE_MAX_ENTRIES}")
+    print(f"  TEXT_NORMALIZATION_ENABLED: {TEXT_NORMALIZATION_ENABLED}")
+    print(f"  TEXT_NORMALIZATION_STEPS: {TEXT_NORMALIZATION_STEPS}")
@@ -1,4 +1,5 @@
-from dataclasses import dataclass, asdict
+import hashlib
+from dataclasses import dataclass, asdict, field
 from datetime import datetime
 
 
@@ -10,6 +11,22 @@ class RawMessageData:
     channel_name: str
     message_text: str
 
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            post_creation_time=datetime.fromisoformat(data['post_creation_time']),
+            scrapped_creation_time=datetime.fromisoformat(data['scrapped_creation_time']),
+            channel_id=data['channel_id'],
+            channel_name=data['channel_name'],
+            message_text=data['message_text'].strip()
+        )
+
+    @property
+    def message_id(self):
+        """Identity of the message: channel, post time and a hash of the text."""
+        text_hash = hashlib.sha256(self.message_text.encode('utf-8')).hexdigest()[:16]
+        return f"{self.channel_id}:{self.post_creation_time.isoformat()}:{text_hash}"
+
     def as_dict(self):
         return {
             "post_creation_time": self.post_creation_time.isoformat(),
@@ -22,10 +39,11 @@ class RawMessageData:
 
 @dataclass
 class ProcessedMessageData:
-    title: str
+    title: str | None
     categories: list[str]
     format: str
     asap: bool
+    keyphrases: list[str] | None = field(default_factory=list)
 
     def as_dict(self):
         return asdict(self)
@@ -35,9 +53,59 @@ class ProcessedMessageData:
 class FullMessageData:
     raw_message_data: RawMessageData
     processed_message_data: ProcessedMessageData
+    extractor_fingerprints: dict[str, str] = field(default_factory=dict)
+    duplicate_of: dict | None = None
+    pending_fields: list[str] = field(default_factory=list)
+
+    def as_dict(self):
+        return {
+            "message_id": self.raw_message_data.message_id,
+            "raw_message_data": self.raw_message_data.as_dict(),
+            "processed_message_data": self.processed_message_data.as_dict(),
+            "extractor_fingerprints": self.extractor_fingerprints,
+            "is_duplicate": self.duplicate_of is not None,
+            "duplicate_of": self.duplicate_of,
+            "pending_fields": self.pending_fields
+        }
+
+
+@dataclass
+class EnrichmentRequestData:
+    """Raw message sent to the enrichment queue, with known field values the enrichment worker may reuse."""
+    raw_message_data: RawMessageData
+    previous_results: dict = field(default_factory=dict)
+    previous_fingerprints: dict = field(default_factory=dict)
 
     def as_dict(self):
         return {
             "raw_message_data": self.raw_message_data.as_dict(),
-            "processed_message_data": self.processed_message_data.as_dict()
+            "processed_message_data": self.previous_results,
+            "extractor_fingerprints": self.previous_fingerprints
+        }
+
+
+@dataclass
+class EnrichmentUpdateData:
+    """Follow-up update with the slow fields of an already published message, keyed by its message_id."""
+    raw_message_data: RawMessageData
+    fields: dict
+    extractor_fingerprints: dict[str, str] = field(default_factory=dict)
+
+    def as_dict(self):
+        return {
+            "update_type": "enrichment",
+            "message_id": self.raw_message_data.message_id,
+            "channel_id": self.raw_message_data.channel_id,
+            "post_creation_time": self.raw_message_data.post_creation_time.isoformat(),
+            "processed_message_data": self.fields,
+            "extractor_fingerprints": self.extractor_fingerprints
         }
+
+
+@dataclass
+class StoredMessageData:
+    """Result of an already completed message, as stored by the idempotency service, republished unchanged."""
+    result: dict
+
+    def as_dict(self):
+        return self.result
@@ -0,0 +1,86 @@
+"""
+Envelope format of the processed queue in envelope output mode: one AMQP message carries a compressed JSON array of
+processed records. Downstream consumers can read both formats with decode_records.
+"""
+import gzip
+import json
+import logging
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+ENVELOPE_SCHEMA = "uopp.processed-message-batch"
+ENVELOPE_SCHEMA_VERSION = 1
+
+SCHEMA_HEADER = 'x-schema'
+SCHEMA_VERSION_HEADER = 'x-schema-version'
+RECORD_COUNT_HEADER = 'x-record-count'
+
+ZSTD_COMPRESSION = "zstd"
+GZIP_COMPRESSION = "gzip"
+NO_COMPRESSION = "none"
+COMPRESSIONS = (ZSTD_COMPRESSION, GZIP_COMPRESSION, NO_COMPRESSION)
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def resolve_compression(compression):
+    """Return the compression to use, falling back to gzip when zstandard is not installed"""
+    if compression == ZSTD_COMPRESSION and zstandard is None:
+        logger.warning("zstandard is not installed, compressing envelopes with gzip instead.")
+        return GZIP_COMPRESSION
+    return compression
+
+
+def content_encoding(compression):
+    """Return the AMQP content-encoding of the compression, None for uncompressed bodies"""
+    return None if compression == NO_COMPRESSION else compression
+
+
+def compress(payload, compression):
+    if compression == ZSTD_COMPRESSION:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    if compression == GZIP_COMPRESSION:
+        return gzip.compress(payload, compresslevel=GZIP_LEVEL)
+    return payload
+
+
+def decompress(body, encoding):
+    if encoding == ZSTD_COMPRESSION:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to decode zstd compressed envelopes")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    if encoding == GZIP_COMPRESSION:
+        return gzip.decompress(body)
+    return body
+
+
+def encode_envelope(serialized_records, compression):
+    """Pack records already serialized to JSON into an envelope, returns the body and its headers"""
+    payload = ("[" + ",".join(serialized_records) + "]").encode("utf-8")
+    headers = {
+        SCHEMA_HEADER: ENVELOPE_SCHEMA,
+        SCHEMA_VERSION_HEADER: ENVELOPE_SCHEMA_VERSION,
+        RECORD_COUNT_HEADER: len(serialized_records)
+    }
+    return compress(payload, compression), headers
+
+
+def decode_records(body, headers=None, encoding=None):
+    """
+    Return the records of a processed queue message. Envelopes yield all their records,
+    plain messages a single one. Pass the AMQP headers and content-encoding of the message.
+    """
+    headers = headers or {}
+    if headers.get(SCHEMA_HEADER) != ENVELOPE_SCHEMA:
+        return [json.loads(body)]
+    version = headers.get(SCHEMA_VERSION_HEADER)
+    if version != ENVELOPE_SCHEMA_VERSION:
+        raise ValueError(f"Unsupported envelope schema version: {version}")
+    return json.loads(decompress(body, encoding))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Script to inspect the dead-letter queue and replay messages from it.
+
+    python dead_letter_tool.py list [--limit 20]
+    python dead_letter_tool.py replay [--limit 20] [--queue telegram_messages]
+
+Listing leaves the messages in the dead-letter queue. Replaying publishes them to their original queue
+(or --queue) without the retry and error headers, then removes them from the dead-letter queue.
+"""
+
+import argparse
+import logging
+import sys
+
+from pika.exceptions import ChannelClosedByBroker
+
+import config
+from client.rabbitmq_client import (DefaultRabbitMQClient, RETRY_COUNT_HEADER, ORIGINAL_QUEUE_HEADER, ERROR_HEADER,
+                                    ERROR_TYPE_HEADER, FAILED_AT_HEADER, DELIVERY_ATTEMPTS_HEADER)
+
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER_HEADERS = (RETRY_COUNT_HEADER, ORIGINAL_QUEUE_HEADER, ERROR_HEADER, ERROR_TYPE_HEADER, FAILED_AT_HEADER,
+                       DELIVERY_ATTEMPTS_HEADER)
+
+
+def list_messages(rabbit_client, queue_name, limit):
+    """Print dead-lettered messages with their errors, returns the number of listed messages"""
+    listed = 0
+    while listed < limit:
+        method, properties, body = rabbit_client.get_message(queue_name)
+        if method is None:
+            break
+        listed += 1
+        headers = properties.headers or {}
+        print(f"#{listed} from '{headers.get(ORIGINAL_QUEUE_HEADER)}' failed at {headers.get(FAILED_AT_HEADER)} "
+              f"after {headers.get(DELIVERY_ATTEMPTS_HEADER)} attempts")
+        print(f"  error: {headers.get(ERROR_TYPE_HEADER)}: {headers.get(ERROR_HEADER)}")
+        print(f"  body: {body.decode('utf-8', errors='replace')}")
+    # Unacknowledged messages return to the queue when the connection is closed
+    return listed
+
+
+def replay_messages(rabbit_client, queue_name, limit, target_queue=None):
+    """Publish dead-lettered messages back for processing, returns the number of replayed messages"""
+    replayed = 0
+    while replayed < limit:
+        method, properties, body = rabbit_client.get_message(queue_name)
+        if method is None:
+            break
+        headers = dict(properties.headers or {})
+        destination = target_queue or headers.get(ORIGINAL_QUEUE_HEADER) or config.RABBIT_RAW_QUEUE_NAME
+        for header in DEAD_LETTER_HEADERS:
+            headers.pop(header, None)
+
+        if not rabbit_client.produce_message(body, destination, headers or None, properties.content_encoding):
+            logger.error("Failed to replay message, stopping.")
+            break
+        rabbit_client.ack_message(method.delivery_tag)
+        replayed += 1
+    return replayed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and replay the dead-letter queue.")
+    parser.add_argument("command", choices=["list", "replay"])
+    parser.add_argument("--limit", type=int, default=20, help="maximum number of messages to list or replay")
+    parser.add_argument("--queue", help="queue to replay to (defaults to the queue the message failed in)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    config.load_config()
+    dead_letter_queue = config.RABBIT_DEAD_LETTER_QUEUE_NAME
+
+    client = DefaultRabbitMQClient(dead_letter_queue, config.RABBIT_DELIVERY_MODE, config.RABBIT_HOST,
+                                   config.RABBIT_PORT, config.RABBIT_USERNAME, config.RABBIT_PASSWORD,
+                                   config.RABBIT_MAX_RETRIES, config.RABBIT_RETRY_DELAY, config.RABBIT_USE_SSL,
+                                   config.RABBIT_VIRTUAL_HOST)
+    if not client.setup_connection():
+        print("Failed to connect to RabbitMQ")
+        sys.exit(1)
+
+    try:
+        # basic_get on a missing queue closes the channel, a passive declare reports it first
+        try:
+            depth = client.get_queue_depth(dead_letter_queue)
+        except ChannelClosedByBroker as e:
+            if e.reply_code != 404:
+                raise
+            print(f"Dead-letter queue '{dead_letter_queue}' does not exist, no message has been dead-lettered yet")
+            sys.exit(0)
+        print(f"Dead-letter queue '{dead_letter_queue}' holds {depth} messages")
+
+        if args.command == "list":
+            count = list_messages(client, dead_letter_queue, args.limit)
+            print(f"Listed {count} messages from '{dead_letter_queue}'")
+        else:
+            count = replay_messages(client, dead_letter_queue, args.limit, args.queue)
+            print(f"Replayed {count} messages from '{dead_letter_queue}'")
+    finally:
+        client.close_connection()
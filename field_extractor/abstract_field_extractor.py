@@ -1,16 +1,99 @@
+import hashlib
+import json
+import sys
 from abc import ABC, abstractmethod
 
+RAW_TEXT_VIEW = 'raw'
+NORMALIZED_TEXT_VIEW = 'normalized'
+
+
+def describe_model(model, **details):
+    """
+    Return a JSON-serializable identity of a loaded spaCy model, Hugging Face pipeline or client object (e.g. the
+    translator), extended with the given details such as the languages it is used with.
+    """
+    meta = getattr(model, 'meta', None)
+    if isinstance(meta, dict):
+        return {
+            "type": "spacy",
+            "name": f"{meta.get('lang')}_{meta.get('name')}",
+            "version": meta.get('version'),
+            **details
+        }
+
+    hf_model = getattr(model, 'model', None)
+    if hf_model is not None and hasattr(hf_model, 'name_or_path'):
+        return {
+            "type": "transformers",
+            "task": getattr(model, 'task', None),
+            "name": hf_model.name_or_path,
+            "revision": getattr(getattr(hf_model, 'config', None), '_commit_hash', None),
+            "forward_params": getattr(model, '_forward_params', {}),
+            **details
+        }
+
+    # Client objects are identified by their package version and the service they call
+    package = sys.modules.get(type(model).__module__.split('.')[0])
+    return {
+        "type": f"{type(model).__module__}.{type(model).__name__}",
+        "version": getattr(package, '__version__', None),
+        "service_urls": sorted(getattr(model, 'service_urls', None) or []),
+        **details
+    }
+
 
 class AbstractFieldExtractor(ABC):
-    def __init__(self, field_name):
+    def __init__(self, field_name, text_view=RAW_TEXT_VIEW):
+        if text_view not in (RAW_TEXT_VIEW, NORMALIZED_TEXT_VIEW):
+            raise ValueError(f"Unknown text view '{text_view}' for field '{field_name}'")
         self._field_name = field_name
+        self._text_view = text_view
+        self._version_fingerprint = None
 
     @property
     def field_name(self):
         """Return the name of the field this provider extracts."""
         return self._field_name
 
+    @property
+    def field_names(self):
+        """Return the names of all fields this provider extracts, override for providers of several fields."""
+        return [self._field_name]
+
+    @property
+    def text_view(self):
+        """Return which view of the message text (raw or normalized) this provider extracts from."""
+        return self._text_view
+
+    @property
+    def version_fingerprint(self):
+        """Return a short hash of the config, labels and model identity the extracted value depends on."""
+        if self._version_fingerprint is None:
+            components = json.dumps(self.fingerprint_components(), sort_keys=True, ensure_ascii=False, default=str)
+            self._version_fingerprint = hashlib.sha256(components.encode('utf-8')).hexdigest()[:16]
+        return self._version_fingerprint
+
+    def fingerprint_components(self):
+        """Return everything that changes the extracted value for the same text. Extend in subclasses."""
+        return {"extractor": type(self).__name__, "field_name": self._field_name, "text_view": self._text_view}
+
+    def reset_version_fingerprint(self):
+        """Drop the cached fingerprint, call after changing labels, config or models in place."""
+        self._version_fingerprint = None
+
     @abstractmethod
     def extract_field(self, text):
         """Extract field data from the text."""
         pass
+
+    def extract_field_batch(self, texts):
+        """Extract field data from several texts, override when the model can process them in one call."""
+        return [self.extract_field(text) for text in texts]
+
+    def extract_fields(self, text):
+        """Extract all fields of the provider from the text, keyed by field name."""
+        return {self._field_name: self.extract_field(text)}
+
+    def extract_fields_batch(self, texts):
+        """Extract all fields of the provider from several texts, one dict keyed by field name per text."""
+        return [{self._field_name: value} for value in self.extract_field_batch(texts)]
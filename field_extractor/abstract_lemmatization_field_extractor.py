@@ -1,14 +1,56 @@
-from abc import ABC
+from abc import ABC, abstractmethod
 
-from field_extractor.abstract_field_extractor import AbstractFieldExtractor
+from field_extractor.abstract_field_extractor import AbstractFieldExtractor, RAW_TEXT_VIEW, describe_model
+from field_extractor.lemma_table import LemmaTable, lemmatize_labels
 
 
 class AbstractLemmatizationFieldExtractor(AbstractFieldExtractor, ABC):
-    def __init__(self, field_name, nlp, labels):
-        super().__init__(field_name)
+    def __init__(self, field_name, nlp, labels, text_view=RAW_TEXT_VIEW, lemma_table_cache=None):
+        super().__init__(field_name, text_view)
         self.nlp = nlp
-        self.lemmatized_labels = self.lemmatize_labels(labels)
+        self.lemma_table_cache = lemma_table_cache
+        self.lemma_table = self.build_lemma_table(labels)
 
-    def lemmatize_labels(self, labels):
-        """Lemmatize a list of labels using the loaded NLP model."""
-        return {label: self.nlp(label)[0].lemma_ for label in labels}
+    @property
+    def labels(self):
+        return list(self.lemma_table.labels)
+
+    @property
+    def lemmatized_labels(self):
+        return self.lemma_table.lemmatized_labels
+
+    def build_lemma_table(self, labels):
+        """Lemmatize the labels using the loaded NLP model, or load them from the lemma table cache."""
+        if self.lemma_table_cache:
+            return self.lemma_table_cache.get_table(self.nlp, labels)
+        return LemmaTable.from_lemmatized_labels(lemmatize_labels(self.nlp, list(dict.fromkeys(labels))))
+
+    def set_lemma_table(self, lemma_table):
+        """Replace the candidates, the table is swapped in one assignment so extractions never see a partial one."""
+        self.lemma_table = lemma_table
+        self.reset_version_fingerprint()
+
+    @abstractmethod
+    def extract_from_doc(self, doc, lemmas):
+        """Extract field data from a text already processed by the NLP model, matching the candidate lemmas."""
+        pass
+
+    def extract_from_docs(self, docs):
+        """Extract field data from several processed texts, override to score them together."""
+        # The whole batch is matched against the same table, even if it is swapped in the meantime
+        lemmas = self.lemma_table.lemmas
+        return [self.extract_from_doc(doc, lemmas) for doc in docs]
+
+    def extract_field(self, text):
+        return self.extract_from_docs([self.nlp(text)])[0]
+
+    def extract_field_batch(self, texts):
+        return self.extract_from_docs(list(self.nlp.pipe(texts)))
+
+    def fingerprint_components(self):
+        components = super().fingerprint_components()
+        components.update({
+            "labels": sorted(self.labels),
+            "model": describe_model(self.nlp)
+        })
+        return components
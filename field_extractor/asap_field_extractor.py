@@ -1,15 +1,15 @@
+from field_extractor.abstract_field_extractor import RAW_TEXT_VIEW
 from field_extractor.abstract_lemmatization_field_extractor import AbstractLemmatizationFieldExtractor
 
 
 class AsapFieldExtractor(AbstractLemmatizationFieldExtractor):
-    def __init__(self, field_name, nlp, labels):
-        super().__init__(field_name, nlp, labels)
+    def __init__(self, field_name, nlp, labels, text_view=RAW_TEXT_VIEW, lemma_table_cache=None):
+        super().__init__(field_name, nlp, labels, text_view, lemma_table_cache)
 
-    def extract_field(self, text):
+    def extract_from_doc(self, doc, lemmas):
         found_asap_terms = []
-        doc = self.nlp(text)
         for token in doc:
             lemma = token.lemma_
-            if lemma in self.lemmatized_labels.values():
+            if lemma in lemmas:
                 found_asap_terms.append(lemma)
         return bool(found_asap_terms)
@@ -1,19 +1,19 @@
+from field_extractor.abstract_field_extractor import RAW_TEXT_VIEW
 from field_extractor.abstract_lemmatization_field_extractor import AbstractLemmatizationFieldExtractor
 
 
 class CategoryFieldExtractor(AbstractLemmatizationFieldExtractor):
-    def __init__(self, field_name, nlp, labels):
-        super().__init__(field_name, nlp, labels)
+    def __init__(self, field_name, nlp, labels, text_view=RAW_TEXT_VIEW, lemma_table_cache=None):
+        super().__init__(field_name, nlp, labels, text_view, lemma_table_cache)
 
         """
         TODO: Drawback: no context considered during extraction 
         """
 
-    def extract_field(self, text):
+    def extract_from_doc(self, doc, lemmas):
         found_categories = []
-        doc = self.nlp(text)
         for token in doc:
             lemma = token.lemma_
-            if lemma in self.lemmatized_labels.values():
+            if lemma in lemmas:
                 found_categories.append(lemma)
         return list(set(found_categories))
@@ -0,0 +1,38 @@
+from field_extractor.abstract_field_extractor import AbstractFieldExtractor
+
+
+class CombinedCategoryFieldExtractor(AbstractFieldExtractor):
+    """Union of the categories found by the lemma and the embedding engines, sharing one spaCy pass."""
+
+    def __init__(self, lemma_extractor, embedding_extractor):
+        super().__init__(lemma_extractor.field_name, lemma_extractor.text_view)
+        self.lemma_extractor = lemma_extractor
+        self.embedding_extractor = embedding_extractor
+        self.nlp = lemma_extractor.nlp
+
+    def build_lemma_table(self, labels):
+        # A prototype table is also a lemma table, so both engines can share it
+        return self.embedding_extractor.build_lemma_table(labels)
+
+    def set_lemma_table(self, lemma_table):
+        self.embedding_extractor.set_lemma_table(lemma_table)
+        self.lemma_extractor.set_lemma_table(lemma_table)
+        self.reset_version_fingerprint()
+
+    def extract_from_docs(self, docs):
+        lemma_categories = self.lemma_extractor.extract_from_docs(docs)
+        embedding_categories = self.embedding_extractor.extract_from_docs(docs)
+        return [list(dict.fromkeys(lemma_found + embedding_found))
+                for lemma_found, embedding_found in zip(lemma_categories, embedding_categories)]
+
+    def extract_field(self, text):
+        return self.extract_from_docs([self.nlp(text)])[0]
+
+    def extract_field_batch(self, texts):
+        return self.extract_from_docs(list(self.nlp.pipe(texts)))
+
+    def fingerprint_components(self):
+        components = super().fingerprint_components()
+        components["engines"] = [self.lemma_extractor.fingerprint_components(),
+                                 self.embedding_extractor.fingerprint_components()]
+        return components
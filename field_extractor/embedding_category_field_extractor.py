@@ -0,0 +1,72 @@
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+from field_extractor.abstract_field_extractor import RAW_TEXT_VIEW
+from field_extractor.abstract_lemmatization_field_extractor import AbstractLemmatizationFieldExtractor
+from field_extractor.lemma_table import LemmaTable
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_rows(vectors):
+    """Scale the rows to unit length, rows without a vector stay zero."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+@dataclass(frozen=True)
+class PrototypeTable(LemmaTable):
+    """Lemma table extended with a unit-length prototype embedding of every category that has a vector."""
+    categories: tuple = ()
+    prototypes: np.ndarray = None
+
+    @classmethod
+    def from_lemma_table(cls, lemma_table, nlp):
+        vectors = np.array([doc.vector for doc in nlp.pipe(lemma_table.labels)], dtype=np.float32)
+        if not len(vectors):
+            vectors = np.zeros((0, nlp.vocab.vectors_length or 1), dtype=np.float32)
+        has_vector = np.linalg.norm(vectors, axis=1) > 0
+        skipped = [label for label, present in zip(lemma_table.labels, has_vector) if not present]
+        if skipped:
+            logger.warning(f"No embedding for categories {skipped}, the embedding engine can't assign them")
+        categories = tuple(lemma_table.lemmatized_labels[label]
+                           for label, present in zip(lemma_table.labels, has_vector) if present)
+        return cls(lemma_table.labels, lemma_table.lemmatized_labels, lemma_table.lemmas,
+                   categories, normalize_rows(vectors[has_vector]))
+
+
+class EmbeddingCategoryFieldExtractor(AbstractLemmatizationFieldExtractor):
+    """
+    Assigns the categories whose prototype embedding has a cosine similarity of at least the threshold with the
+    message embedding (spaCy doc.vector). A batch is scored against all categories in one matrix multiplication.
+    The model needs static word vectors: without them doc.vector averages contextual tensors, whose similarities
+    don't separate categories.
+    """
+
+    def __init__(self, field_name, nlp, labels, threshold, text_view=RAW_TEXT_VIEW, lemma_table_cache=None):
+        if not nlp.vocab.vectors.shape[0]:
+            raise ValueError(f"spaCy model '{nlp.meta.get('lang')}_{nlp.meta.get('name')}' has no word vectors, "
+                             f"the embedding category engine needs a model with vectors such as uk_core_news_lg")
+        self.threshold = threshold
+        super().__init__(field_name, nlp, labels, text_view, lemma_table_cache)
+
+    def build_lemma_table(self, labels):
+        return PrototypeTable.from_lemma_table(super().build_lemma_table(labels), self.nlp)
+
+    def extract_from_doc(self, doc, lemmas):
+        return self.extract_from_docs([doc])[0]
+
+    def extract_from_docs(self, docs):
+        table = self.lemma_table
+        if not docs or not table.categories:
+            return [[] for _ in docs]
+        embeddings = normalize_rows(np.array([doc.vector for doc in docs], dtype=np.float32))
+        scores = embeddings @ table.prototypes.T
+        return [[table.categories[index] for index in np.flatnonzero(row >= self.threshold)] for row in scores]
+
+    def fingerprint_components(self):
+        components = super().fingerprint_components()
+        components["threshold"] = self.threshold
+        return components
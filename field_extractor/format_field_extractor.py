@@ -1,12 +1,17 @@
-from field_extractor.abstract_field_extractor import AbstractFieldExtractor
+from field_extractor.abstract_field_extractor import AbstractFieldExtractor, RAW_TEXT_VIEW
 
 
 class FormatFieldExtractor(AbstractFieldExtractor):
     ONLINE = 'онлайн'
     OFFLINE = 'офлайн'
 
-    def __init__(self, field_name):
-        super().__init__(field_name)
+    def __init__(self, field_name, text_view=RAW_TEXT_VIEW):
+        super().__init__(field_name, text_view)
+
+    def fingerprint_components(self):
+        components = super().fingerprint_components()
+        components.update({"online": self.ONLINE, "offline": self.OFFLINE})
+        return components
 
     def extract_field(self, text):
         """
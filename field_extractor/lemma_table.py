@@ -0,0 +1,62 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+
+from field_extractor.abstract_field_extractor import describe_model
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LemmaTable:
+    """Candidate labels with their lemmas, replaced as a whole when the candidates change."""
+    labels: tuple
+    lemmatized_labels: dict
+    lemmas: frozenset
+
+    @classmethod
+    def from_lemmatized_labels(cls, lemmatized_labels):
+        return cls(tuple(lemmatized_labels), dict(lemmatized_labels), frozenset(lemmatized_labels.values()))
+
+
+def lemmatize_labels(nlp, labels):
+    """Lemmatize the labels in one nlp.pipe pass, a label is matched by the lemma of its first token."""
+    return {label: doc[0].lemma_ for label, doc in zip(labels, nlp.pipe(labels)) if len(doc)}
+
+
+class DefaultLemmaTableCache:
+    """Keeps lemmatized candidate tables on disk, keyed by a hash of the labels and the spaCy model version."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def cache_key(self, nlp, labels):
+        components = json.dumps({"labels": list(labels), "model": describe_model(nlp)},
+                                sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(components.encode('utf-8')).hexdigest()[:16]
+
+    def get_table(self, nlp, labels):
+        labels = list(dict.fromkeys(labels))
+        path = os.path.join(self.cache_dir, f"{self.cache_key(nlp, labels)}.json")
+        try:
+            with open(path, encoding='utf-8') as cache_file:
+                return LemmaTable.from_lemmatized_labels(json.load(cache_file))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable lemma table cache '{path}': {e}")
+
+        lemmatized_labels = lemmatize_labels(nlp, labels)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Written to a temporary file and renamed, so concurrent workers never read a partial table
+            file_descriptor, temporary_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(file_descriptor, 'w', encoding='utf-8') as cache_file:
+                json.dump(lemmatized_labels, cache_file, ensure_ascii=False)
+            os.replace(temporary_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache lemma table in '{self.cache_dir}': {e}")
+        return LemmaTable.from_lemmatized_labels(lemmatized_labels)
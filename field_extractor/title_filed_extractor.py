@@ -1,18 +1,35 @@
 from transformers import pipeline
 
-from field_extractor.abstract_field_extractor import AbstractFieldExtractor
+from field_extractor.abstract_field_extractor import AbstractFieldExtractor, RAW_TEXT_VIEW, describe_model
 
 
 class TitleFieldExtractor(AbstractFieldExtractor):
-    def __init__(self, field_name, translator, pipeline):
-        super().__init__(field_name)
+    def __init__(self, field_name, translator, pipeline, text_view=RAW_TEXT_VIEW, message_language='uk',
+                 model_language='en'):
+        super().__init__(field_name, text_view)
         self.translator = translator
         self.pipeline = pipeline
+        # Messages are translated to the model's language and the generated text back
+        self.message_language = message_language
+        self.model_language = model_language
 
     def translate_text(self, text, src, dest):
         translation = self.translator.translate(text, src=src, dest=dest)
         return translation.text
 
+    def translate_texts(self, texts, src, dest):
+        """Translate several texts with one translator call."""
+        translations = self.translator.translate(texts, src=src, dest=dest)
+        return [translation.text for translation in translations]
+
+    def fingerprint_components(self):
+        components = super().fingerprint_components()
+        components.update({
+            "translator": describe_model(self.translator, source_language=self.message_language,
+                                         target_language=self.model_language),
+            "model": describe_model(self.pipeline)
+        })
+        return components
 
     def extract_field(self, text):
         '''
@@ -23,12 +40,19 @@ class TitleFieldExtractor(AbstractFieldExtractor):
         Possible solutions are to find a Ukrainian model specified on title generation or create a new one
         '''
         # Translate text to English
-        text_en = self.translate_text(text, src='uk', dest='en')
+        text_en = self.translate_text(text, src=self.message_language, dest=self.model_language)
 
         # Generate title in English
         result = self.pipeline(text_en)
         title_en = result[0]['generated_text']
 
         # Translate the title back to Ukrainian
-        title_uk = self.translate_text(title_en, src='en', dest='uk')
+        title_uk = self.translate_text(title_en, src=self.model_language, dest=self.message_language)
         return title_uk
+
+    def extract_field_batch(self, texts):
+        """Translate and generate titles for all texts at once: two translator calls and one batched pipeline call."""
+        texts_en = self.translate_texts(texts, src=self.message_language, dest=self.model_language)
+        results = self.pipeline(texts_en, batch_size=len(texts_en))
+        titles_en = [result['generated_text'] for result in results]
+        return self.translate_texts(titles_en, src=self.model_language, dest=self.message_language)
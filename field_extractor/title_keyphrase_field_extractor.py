@@ -0,0 +1,108 @@
+import re
+
+import torch
+from transformers.modeling_outputs import BaseModelOutput
+
+from field_extractor.abstract_field_extractor import RAW_TEXT_VIEW
+from field_extractor.title_filed_extractor import TitleFieldExtractor
+
+KEYPHRASE_SEPARATOR_PATTERN = re.compile(r'[,;\n]')
+
+
+def split_keyphrases(text):
+    """Split generated keyphrases into a list without duplicates or empty entries."""
+    return list(dict.fromkeys(phrase.strip() for phrase in KEYPHRASE_SEPARATOR_PATTERN.split(text) if phrase.strip()))
+
+
+class TitleKeyphraseFieldExtractor(TitleFieldExtractor):
+    """
+    Generates the title and keyphrases of a message with the multitask model: the translated text is encoded once and
+    both outputs are decoded from the same encoder output, the task being selected by a decoder prompt.
+    """
+
+    def __init__(self, field_name, keyphrases_field_name, translator, pipeline, title_prompt='', keyphrase_prompt='',
+                 title_max_length=20, keyphrase_max_length=32, text_view=RAW_TEXT_VIEW):
+        super().__init__(field_name, translator, pipeline, text_view)
+        self.keyphrases_field_name = keyphrases_field_name
+        self.title_prompt = title_prompt
+        self.keyphrase_prompt = keyphrase_prompt
+        self.title_max_length = title_max_length
+        self.keyphrase_max_length = keyphrase_max_length
+
+    @property
+    def field_names(self):
+        return [self.field_name, self.keyphrases_field_name]
+
+    def fingerprint_components(self):
+        components = super().fingerprint_components()
+        components.update({
+            "field_names": self.field_names,
+            "title_prompt": self.title_prompt,
+            "keyphrase_prompt": self.keyphrase_prompt,
+            "title_max_length": self.title_max_length,
+            "keyphrase_max_length": self.keyphrase_max_length
+        })
+        return components
+
+    def decode(self, encoder_outputs, attention_mask, prompt, max_length):
+        """
+        Generate from an encoder output, starting the decoder with the prompt if there is one. max_length limits the
+        decoded sequence like the pipeline's max_length does, not counting the prompt, so without a prompt the output
+        is the same as the pipeline's.
+        """
+        tokenizer = self.pipeline.tokenizer
+        model = self.pipeline.model
+        generation_kwargs = {}
+        prompt_ids = tokenizer(prompt, add_special_tokens=False)['input_ids'] if prompt else []
+        if prompt_ids:
+            start_ids = [model.config.decoder_start_token_id]
+            forced_bos_token_id = getattr(model.generation_config, 'forced_bos_token_id', None)
+            if forced_bos_token_id is not None:
+                start_ids.append(forced_bos_token_id)
+            generation_kwargs['decoder_input_ids'] = torch.tensor([start_ids + prompt_ids] * attention_mask.shape[0],
+                                                                  device=model.device)
+
+        # generate expands the encoder output in place for beam search, so every decoding gets its own copy
+        generated = model.generate(encoder_outputs=BaseModelOutput(last_hidden_state=encoder_outputs.last_hidden_state),
+                                   attention_mask=attention_mask, max_length=max_length + len(prompt_ids),
+                                   **generation_kwargs)
+        if prompt_ids:
+            # The prompt is cut by token, its decoded text isn't always a prefix of the decoded output
+            generated = generated[:, generation_kwargs['decoder_input_ids'].shape[1]:]
+        return [text.strip() for text in tokenizer.batch_decode(generated, skip_special_tokens=True)]
+
+    def generate(self, texts_en):
+        """Encode the texts once and decode the titles and the keyphrases from the same encoder output."""
+        model = self.pipeline.model
+        inputs = self.pipeline.tokenizer(texts_en, return_tensors='pt', padding=True, truncation=True).to(model.device)
+        with torch.no_grad():
+            encoder_outputs = model.get_encoder()(input_ids=inputs['input_ids'], attention_mask=inputs['attention_mask'],
+                                                  return_dict=True)
+            titles_en = self.decode(encoder_outputs, inputs['attention_mask'], self.title_prompt,
+                                    self.title_max_length)
+            keyphrases_en = self.decode(encoder_outputs, inputs['attention_mask'], self.keyphrase_prompt,
+                                        self.keyphrase_max_length)
+        return titles_en, keyphrases_en
+
+    def extract_field(self, text):
+        return self.extract_fields(text)[self.field_name]
+
+    def extract_field_batch(self, texts):
+        return [fields[self.field_name] for fields in self.extract_fields_batch(texts)]
+
+    def extract_fields(self, text):
+        return self.extract_fields_batch([text])[0]
+
+    def extract_fields_batch(self, texts):
+        """One translator call each way and one encoder pass for all texts."""
+        titles_en, keyphrases_en = self.generate(self.translate_texts(texts, src=self.message_language,
+                                                                      dest=self.model_language))
+        keyphrase_lists = [split_keyphrases(keyphrases) for keyphrases in keyphrases_en]
+
+        # Titles and all keyphrases are translated back together, then regrouped per text
+        translated = self.translate_texts(titles_en + [phrase for phrases in keyphrase_lists for phrase in phrases],
+                                          src=self.model_language, dest=self.message_language)
+        titles, translated_phrases = translated[:len(titles_en)], iter(translated[len(titles_en):])
+        return [{self.field_name: title,
+                 self.keyphrases_field_name: list(dict.fromkeys(next(translated_phrases) for _ in phrases))}
+                for title, phrases in zip(titles, keyphrase_lists)]
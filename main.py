@@ -3,8 +3,6 @@ import subprocess
 import sys
 import time
 import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import socketserver
 
 import spacy
 from googletrans import Translator
@@ -12,35 +10,24 @@ from transformers import pipeline
 
 from config import load_config
 from service.field_extractor_service import DefaultFieldsExtractionService
+from service.text_normalization_service import DefaultTextNormalizationService
+from service.candidate_reload_service import DefaultCandidateReloadService
+from field_extractor.abstract_field_extractor import NORMALIZED_TEXT_VIEW
 from field_extractor.title_filed_extractor import TitleFieldExtractor
+from field_extractor.title_keyphrase_field_extractor import TitleKeyphraseFieldExtractor
 from field_extractor.category_field_extractor import CategoryFieldExtractor
 from field_extractor.format_field_extractor import FormatFieldExtractor
 from field_extractor.asap_field_extractor import AsapFieldExtractor
-from message_processing.message_consumer import DefaultMessageConsumer
-from message_processing.message_processor import DefaultMessageProcessor
-from message_processing.message_producer import DefaultMessageProducer
-from client.rabbitmq_client import DefaultRabbitMQClient
-
-
-class HealthCheckHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        if self.path == '/health':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(b'OK')
-        else:
-            self.send_response(404)
-            self.end_headers()
-
-def start_health_server():
-    """Start a simple HTTP server for health checks"""
-    try:
-        with socketserver.TCPServer(("", 8080), HealthCheckHandler) as httpd:
-            print("Health check server started on port 8080")
-            httpd.serve_forever()
-    except Exception as e:
-        print(f"Failed to start health server: {e}")
+from field_extractor.embedding_category_field_extractor import EmbeddingCategoryFieldExtractor
+from field_extractor.combined_category_field_extractor import CombinedCategoryFieldExtractor
+from field_extractor.lemma_table import DefaultLemmaTableCache
+from message_processing.pipeline_builder import (worker_role, build_rabbit_client, build_message_pipeline,
+                                                  register_message_pipeline)
+from monitoring.health_server import start_health_server
+from monitoring.metrics import DefaultMetricsRegistry
+from monitoring.memory_monitor import DefaultMemoryMonitor
+from monitoring.profiler import DefaultProfiler
+
 
 def setup_logging(log_level="INFO"):
     """Setup logging configuration."""
@@ -55,44 +42,54 @@ def setup_logging(log_level="INFO"):
     logger.info(f"Logging level set to: {log_level}")
     return logger
 
-def download_models_if_needed():
+def download_models_if_needed(spacy_model, needs_spacy=True, needs_transformers=True):
     """Download NLP models if they don't exist."""
     logger = logging.getLogger(__name__)
     
     # Check if spaCy model exists
-    try:
-        nlp = spacy.load("uk_core_news_sm")
-        logger.info("spaCy Ukrainian model already exists")
-    except OSError:
-        logger.info("Downloading spaCy Ukrainian model...")
+    if needs_spacy:
         try:
-            result = subprocess.run([
-                sys.executable, "-m", "spacy", "download", "uk_core_news_sm"
-            ], check=True, capture_output=True, text=True, timeout=300)
-            logger.info("spaCy Ukrainian model downloaded successfully")
-        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
-            logger.error(f"Failed to download spaCy model: {e}")
-            return False
+            nlp = spacy.load(spacy_model)
+            logger.info(f"spaCy model {spacy_model} already exists")
+        except OSError:
+            logger.info(f"Downloading spaCy model {spacy_model}...")
+            try:
+                result = subprocess.run([
+                    sys.executable, "-m", "spacy", "download", spacy_model
+                ], check=True, capture_output=True, text=True, timeout=300)
+                logger.info("spaCy Ukrainian model downloaded successfully")
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+                logger.error(f"Failed to download spaCy model: {e}")
+                return False
     
     # Check if transformers model exists (will download automatically if not)
-    try:
-        logger.info("Checking transformers model...")
-        from transformers import pipeline
-        # This will download the model if it doesn't exist
-        test_pipeline = pipeline("text2text-generation", 
-                               model="beogradjanka/bart_multitask_finetuned_for_title_and_keyphrase_generation", 
-                               max_length=20)
-        logger.info("Transformers model ready")
-    except Exception as e:
-        logger.error(f"Failed to load/download transformers model: {e}")
-        return False
+    if needs_transformers:
+        try:
+            logger.info("Checking transformers model...")
+            from transformers import pipeline
+            # This will download the model if it doesn't exist
+            test_pipeline = pipeline("text2text-generation", 
+                                   model="beogradjanka/bart_multitask_finetuned_for_title_and_keyphrase_generation", 
+                                   max_length=20)
+            logger.info("Transformers model ready")
+        except Exception as e:
+            logger.error(f"Failed to load/download transformers model: {e}")
+            return False
     
     return True
 
 def main():
     try:
         # Start health check server in a separate thread
-        health_thread = threading.Thread(target=start_health_server, daemon=True)
+        metrics_registry = DefaultMetricsRegistry()
+        # Started before the models load so the trend includes them, the limits are set once config is loaded
+        memory_monitor = DefaultMemoryMonitor()
+        metrics_registry.register(memory_monitor.metrics)
+        # Debug endpoints are localhost-only until the token is set from the config
+        profiler = DefaultProfiler()
+        health_thread = threading.Thread(target=start_health_server, args=(metrics_registry,),
+                                         kwargs={'memory_monitor': memory_monitor, 'profiler': profiler},
+                                         daemon=True)
         health_thread.start()
         
         # Give the health server time to start
@@ -114,13 +111,15 @@ def main():
         # Import config variables after loading
         try:
             from config import (
-                RABBIT_RAW_QUEUE_NAME, RABBIT_DELIVERY_MODE, RABBIT_HOST,
-                RABBIT_USERNAME, RABBIT_RETRY_DELAY, RABBIT_MAX_RETRIES,
-                RABBIT_PASSWORD, RABBIT_PORT, RABBIT_PROCESSED_QUEUE_NAME,
-                RABBIT_USE_SSL, RABBIT_VIRTUAL_HOST,
                 HUGGING_FACE_MODEL_TASK, HUGGING_FACE_MODEL, HUGGING_FACE_MODEL_MAX_TOKEN_LENGTH,
                 SPACY_MODEL, CATEGORIES_CANDIDATES, ASAP_CANDIDATES,
-                TITLE_LABEL, CATEGORIES_LABEL, FORMAT_LABEL, ASAP_LABEL, LOG_LEVEL
+                TITLE_LABEL, CATEGORIES_LABEL, FORMAT_LABEL, ASAP_LABEL, LOG_LEVEL,
+                TEXT_NORMALIZATION_ENABLED, TEXT_NORMALIZATION_STEPS, PROCESSING_MODE, WORKER_ROLE,
+                WORKER_RECYCLE_EXIT_CODE, PROFILER_TOKEN,
+                CANDIDATES_FILE, LEMMA_CACHE_DIR,
+                CATEGORY_ENGINE, CATEGORY_EMBEDDING_THRESHOLD, EMBEDDING_CATEGORY_ENGINE, COMBINED_CATEGORY_ENGINE,
+                KEYPHRASES_LABEL, KEYPHRASE_GENERATION_ENABLED, TITLE_DECODER_PROMPT, KEYPHRASE_DECODER_PROMPT,
+                KEYPHRASE_MAX_TOKEN_LENGTH
             )
         except Exception as e:
             logger.error(f"Failed to import configuration variables: {e}")
@@ -128,11 +127,18 @@ def main():
         
         # Reconfigure logging with the actual log level from config
         logger = setup_logging(LOG_LEVEL)
+        profiler.token = PROFILER_TOKEN
         
+        role = worker_role()
+        needs_lemmatization = role.needs_lemmatization
+        needs_generation = role.needs_generation
+        logger.info(f"Processing mode: {PROCESSING_MODE}, worker role: {WORKER_ROLE}, "
+                    f"consuming '{role.consumed_queue_name}'")
+
         # Download models if needed (only once during startup)
         logger.info("Checking for required NLP models...")
         try:
-            if not download_models_if_needed():
+            if not download_models_if_needed(SPACY_MODEL, needs_lemmatization, needs_generation):
                 logger.error("Failed to download required models. Exiting...")
                 return
         except Exception as e:
@@ -142,11 +148,11 @@ def main():
         # Load NLP models once during startup
         logger.info("Loading NLP models...")
         try:
-            nlp = spacy.load(SPACY_MODEL)
-            translator = Translator()
+            nlp = spacy.load(SPACY_MODEL) if needs_lemmatization else None
+            translator = Translator() if needs_generation else None
             pipeline_bart = pipeline(HUGGING_FACE_MODEL_TASK,
                                      model=HUGGING_FACE_MODEL,
-                                     max_length=HUGGING_FACE_MODEL_MAX_TOKEN_LENGTH)
+                                     max_length=HUGGING_FACE_MODEL_MAX_TOKEN_LENGTH) if needs_generation else None
             logger.info("NLP models loaded successfully.")
         except Exception as e:
             logger.error(f"Failed to load NLP models: {e}")
@@ -154,15 +160,49 @@ def main():
 
         # Create instances of field extractors (using the loaded models)
         try:
-            extractors = [
-                TitleFieldExtractor(TITLE_LABEL, translator, pipeline_bart),
-                CategoryFieldExtractor(CATEGORIES_LABEL, nlp, CATEGORIES_CANDIDATES),
-                FormatFieldExtractor(FORMAT_LABEL),
-                AsapFieldExtractor(ASAP_LABEL, nlp, ASAP_CANDIDATES)
-            ]
+            # Translation, generation and lemmatization read the normalized text, format matching reads the raw one
+            extractors = []
+            candidate_reload_service = None
+            if needs_generation and KEYPHRASE_GENERATION_ENABLED:
+                # One encoder pass per message for both the title and the keyphrases
+                extractors.append(TitleKeyphraseFieldExtractor(
+                    TITLE_LABEL, KEYPHRASES_LABEL, translator, pipeline_bart, TITLE_DECODER_PROMPT,
+                    KEYPHRASE_DECODER_PROMPT, HUGGING_FACE_MODEL_MAX_TOKEN_LENGTH, KEYPHRASE_MAX_TOKEN_LENGTH,
+                    NORMALIZED_TEXT_VIEW))
+            elif needs_generation:
+                extractors.append(TitleFieldExtractor(TITLE_LABEL, translator, pipeline_bart, NORMALIZED_TEXT_VIEW))
+            if needs_lemmatization:
+                lemma_table_cache = DefaultLemmaTableCache(LEMMA_CACHE_DIR)
+                # Categories come from exact lemma matches, embedding similarity, or the union of both
+                lemma_category_extractor = embedding_category_extractor = None
+                if CATEGORY_ENGINE != EMBEDDING_CATEGORY_ENGINE:
+                    lemma_category_extractor = CategoryFieldExtractor(CATEGORIES_LABEL, nlp, CATEGORIES_CANDIDATES,
+                                                                      NORMALIZED_TEXT_VIEW, lemma_table_cache)
+                if CATEGORY_ENGINE in (EMBEDDING_CATEGORY_ENGINE, COMBINED_CATEGORY_ENGINE):
+                    embedding_category_extractor = EmbeddingCategoryFieldExtractor(
+                        CATEGORIES_LABEL, nlp, CATEGORIES_CANDIDATES, CATEGORY_EMBEDDING_THRESHOLD,
+                        NORMALIZED_TEXT_VIEW, lemma_table_cache)
+                if lemma_category_extractor and embedding_category_extractor:
+                    category_extractor = CombinedCategoryFieldExtractor(lemma_category_extractor,
+                                                                        embedding_category_extractor)
+                else:
+                    category_extractor = lemma_category_extractor or embedding_category_extractor
+                asap_extractor = AsapFieldExtractor(ASAP_LABEL, nlp, ASAP_CANDIDATES, NORMALIZED_TEXT_VIEW,
+                                                    lemma_table_cache)
+                extractors.extend([category_extractor, FormatFieldExtractor(FORMAT_LABEL), asap_extractor])
+                if CANDIDATES_FILE:
+                    # The file overrides the candidates from the config and is checked for edits while consuming
+                    candidate_reload_service = DefaultCandidateReloadService(CANDIDATES_FILE,
+                                                                             [category_extractor, asap_extractor])
+                    candidate_reload_service.reload_if_changed()
+                    metrics_registry.register(candidate_reload_service.metrics)
+
+            text_normalization_service = None
+            if TEXT_NORMALIZATION_ENABLED:
+                text_normalization_service = DefaultTextNormalizationService(TEXT_NORMALIZATION_STEPS)
 
             # Initialize extraction service with the extractors
-            extraction_service = DefaultFieldsExtractionService(extractors)
+            extraction_service = DefaultFieldsExtractionService(extractors, text_normalization_service)
         except Exception as e:
             logger.error(f"Failed to create field extractors: {e}")
             return
@@ -170,9 +210,7 @@ def main():
         # Configure and start the RabbitMQ client
         logger.info("Initializing RabbitMQ client...")
         try:
-            rabbit_client = DefaultRabbitMQClient(RABBIT_RAW_QUEUE_NAME, RABBIT_DELIVERY_MODE, RABBIT_HOST, RABBIT_PORT,
-                                                  RABBIT_USERNAME, RABBIT_PASSWORD, RABBIT_MAX_RETRIES, RABBIT_RETRY_DELAY,
-                                                  RABBIT_USE_SSL, RABBIT_VIRTUAL_HOST)
+            rabbit_client = build_rabbit_client(role.consumed_queue_name)
         except Exception as e:
             logger.error(f"Failed to initialize RabbitMQ client: {e}")
             return
@@ -189,9 +227,7 @@ def main():
 
         # Setup message processing instances
         try:
-            message_producer = DefaultMessageProducer(rabbit_client, RABBIT_PROCESSED_QUEUE_NAME)
-            message_processor = DefaultMessageProcessor(extraction_service, message_producer)
-            message_consumer = DefaultMessageConsumer(message_processor)
+            message_pipeline = build_message_pipeline(rabbit_client, extraction_service, metrics_registry, role)
         except Exception as e:
             logger.error(f"Failed to setup message processing: {e}")
             return
@@ -200,9 +236,9 @@ def main():
         logger.info("Press Ctrl+C to stop the application.")
         
         try:
-            # Register the message consumer and start consuming
-            rabbit_client.register_message_consumer(message_consumer.consume_message, RABBIT_RAW_QUEUE_NAME)
-            
+            # Register the message consumer, its periodic callbacks and recycling limits, and start consuming
+            register_message_pipeline(rabbit_client, message_pipeline, role, memory_monitor, candidate_reload_service)
+
             # This will run continuously until explicitly stopped
             rabbit_client.start_consuming()
             
@@ -216,9 +252,15 @@ def main():
             try:
                 rabbit_client.stop_consuming()
                 rabbit_client.close_connection()
+                message_pipeline.close()
                 logger.info("Application stopped.")
             except Exception as e:
                 logger.error(f"Error during cleanup: {e}")
+
+        if rabbit_client.stop_reason:
+            # Exit with a failure so the platform restarts the recycled worker
+            logger.info(f"Worker recycled: {rabbit_client.stop_reason}")
+            sys.exit(WORKER_RECYCLE_EXIT_CODE)
                 
     except Exception as e:
         # Catch any unhandled exceptions to prevent crashes
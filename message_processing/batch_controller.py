@@ -0,0 +1,106 @@
+import logging
+import statistics
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+GROW_ACTION = "grow"
+SHRINK_ACTION = "shrink"
+HOLD_ACTION = "hold"
+
+
+class DefaultBatchController:
+    """
+    Adjusts the consumer batch size and prefetch to the raw queue depth and the measured per-message latency:
+    small batches while the queue is live for low latency, large batches under backlog for throughput,
+    always shrinking when the p95 latency exceeds the target.
+    """
+
+    def __init__(self, min_batch_size, max_batch_size, max_prefetch_count, max_batch_wait, target_p95_latency,
+                 adaptive=True, latency_window=500):
+        self.min_batch_size = max(1, min_batch_size)
+        self.max_batch_size = max(self.min_batch_size, max_batch_size)
+        self.max_prefetch_count = max(1, max_prefetch_count)
+        self.max_batch_wait = max_batch_wait
+        self.target_p95_latency = target_p95_latency
+        self.adaptive = adaptive
+
+        self.batch_size = self.min_batch_size
+        self.prefetch_count = self._prefetch_for(self.batch_size)
+        self.queue_depth = None
+        self.last_action = HOLD_ACTION
+        self.decisions = {GROW_ACTION: 0, SHRINK_ACTION: 0, HOLD_ACTION: 0}
+
+        self._latencies = deque(maxlen=latency_window)
+        self._interval_messages = 0
+        self._interval_busy_seconds = 0.0
+        self._messages_total = 0
+        self._batches_total = 0
+        self._throughput = None
+        self._latency_p95 = None
+
+    def _prefetch_for(self, batch_size):
+        # Keep the next batch on its way while the current one is processed
+        return min(self.max_prefetch_count, max(1, batch_size * 2))
+
+    def record_batch(self, message_count, duration, latencies):
+        """Record a processed batch: its size, processing time and the delivery-to-ack latency of its messages."""
+        self._latencies.extend(latencies)
+        self._interval_messages += message_count
+        self._interval_busy_seconds += duration
+        self._messages_total += message_count
+        self._batches_total += 1
+
+    def adjust(self, queue_depth):
+        """Decide the batch size and prefetch for the next interval, returns True if the prefetch changed."""
+        self.queue_depth = queue_depth
+        has_samples = bool(self._latencies)
+        if has_samples:
+            self._latency_p95 = statistics.quantiles(self._latencies, n=20)[-1] if len(self._latencies) > 1 \
+                else self._latencies[0]
+        if self._interval_busy_seconds > 0:
+            self._throughput = self._interval_messages / self._interval_busy_seconds
+        self._interval_messages = 0
+        self._interval_busy_seconds = 0.0
+
+        action, batch_size = HOLD_ACTION, self.batch_size
+        if self.adaptive and has_samples:
+            if self._latency_p95 > self.target_p95_latency:
+                action, batch_size = SHRINK_ACTION, max(self.min_batch_size, self.batch_size // 2)
+            elif queue_depth is not None and queue_depth >= 2 * self.batch_size \
+                    and self._latency_p95 < 0.7 * self.target_p95_latency:
+                action, batch_size = GROW_ACTION, min(self.max_batch_size, self.batch_size * 2)
+            elif queue_depth == 0:
+                action, batch_size = SHRINK_ACTION, max(self.min_batch_size, self.batch_size // 2)
+        if batch_size == self.batch_size:
+            action = HOLD_ACTION
+        else:
+            logger.info(f"Batch controller: {action} batch size {self.batch_size} -> {batch_size} "
+                        f"(queue depth {queue_depth}, p95 latency {self._latency_p95:.2f}s)")
+            # Latencies measured with the old batch size no longer describe the new one
+            self._latencies.clear()
+
+        self.batch_size = batch_size
+        self.last_action = action
+        self.decisions[action] += 1
+
+        prefetch_count = self._prefetch_for(batch_size)
+        prefetch_changed = prefetch_count != self.prefetch_count
+        self.prefetch_count = prefetch_count
+        return prefetch_changed
+
+    def metrics(self):
+        metrics = [
+            ("batch_size", None, self.batch_size),
+            ("prefetch_count", None, self.prefetch_count),
+            ("raw_queue_depth", None, self.queue_depth),
+            ("latency_p95_seconds", None, self._latency_p95),
+            ("latency_target_p95_seconds", None, self.target_p95_latency),
+            ("throughput_messages_per_second", None, self._throughput),
+            ("messages_processed_total", None, self._messages_total),
+            ("batches_processed_total", None, self._batches_total),
+        ]
+        metrics.extend(("batch_controller_decisions_total", {"action": action}, count)
+                       for action, count in self.decisions.items())
+        metrics.append(("batch_controller_last_action", {"action": self.last_action}, 1))
+        return metrics
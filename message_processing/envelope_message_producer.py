@@ -0,0 +1,79 @@
+import json
+import logging
+
+from client.rabbitmq_client import PublishError
+from data.message_envelope import encode_envelope, resolve_compression, content_encoding
+
+logger = logging.getLogger(__name__)
+
+
+class DefaultEnvelopeMessageProducer:
+    """
+    Packs produced messages into compressed envelopes of up to max_records records or max_bytes of JSON.
+    A full envelope is handed to the publisher threads right away; flush publishes the pending records and waits for
+    the confirms of all envelopes, which has to happen before the consumed messages are acknowledged.
+    """
+
+    def __init__(self, rabbit_client, queue_name, max_records, max_bytes, compression):
+        self.rabbit_client = rabbit_client
+        self.queue_name = queue_name
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.compression = resolve_compression(compression)
+        self._flushes = 0
+        self._in_flight = []
+        self.reset()
+
+    def produce_message(self, full_message):
+        serialized = json.dumps(full_message.as_dict(), ensure_ascii=False)
+        size = len(serialized.encode("utf-8"))
+        if self._pending_records and (len(self._pending_records) >= self.max_records or
+                                      self._pending_bytes + size > self.max_bytes):
+            self._publish_pending()
+        self._pending_records.append(serialized)
+        self._pending_bytes += size
+
+    def checkpoint(self):
+        """Return a marker of the pending records, to roll back the records of a message that failed"""
+        return self._flushes, len(self._pending_records)
+
+    def rollback(self, checkpoint):
+        """Drop the records produced since the checkpoint, so a failed message's output is not published"""
+        flushes, pending_count = checkpoint
+        # After a flush only records produced since the checkpoint are pending
+        keep = pending_count if flushes == self._flushes else 0
+        if keep < len(self._pending_records):
+            del self._pending_records[keep:]
+            self._pending_bytes = sum(len(record.encode("utf-8")) for record in self._pending_records)
+
+    def _publish_pending(self):
+        body, headers = encode_envelope(self._pending_records, self.compression)
+        future = self.rabbit_client.produce_message_async(body, self.queue_name, headers,
+                                                          content_encoding(self.compression))
+        self._in_flight.append((future, len(self._pending_records)))
+        logger.info(f"Producing envelope of {len(self._pending_records)} records to queue '{self.queue_name}' "
+                    f"({self._pending_bytes} bytes of JSON, {len(body)} bytes published)")
+        self._flushes += 1
+        self._pending_records = []
+        self._pending_bytes = 0
+
+    def flush(self):
+        """Publish the pending records as one envelope and wait for the confirms of all envelopes produced"""
+        try:
+            if self._pending_records:
+                self._publish_pending()
+            in_flight, self._in_flight = self._in_flight, []
+            failed = sum(record_count for future, record_count in in_flight if not future.result())
+            if failed:
+                raise PublishError(f"RabbitMQ client could not publish {failed} records to queue '{self.queue_name}'")
+        except Exception as e:
+            logger.error(f"Failed to send envelope to queue '{self.queue_name}': {str(e)}")
+            raise
+
+    def reset(self):
+        """Drop the pending and unconfirmed records, used when their consumed messages are failed and redelivered"""
+        for future, _ in self._in_flight:
+            future.cancel()
+        self._in_flight = []
+        self._pending_records = []
+        self._pending_bytes = 0
@@ -1,7 +1,7 @@
 import json
 import logging
-from datetime import datetime
 
+from client.rabbitmq_client import MalformedMessageError
 from data.message_data import RawMessageData
 
 logger = logging.getLogger(__name__)
@@ -12,33 +12,65 @@ class DefaultMessageConsumer:
         self.message_processor = message_processor
 
     def consume_message(self, message):
-        try:
+        """
+        Decode and process a consumed message. Processing failures are re-raised, so that the RabbitMQ client retries
+        them and moves them to the dead-letter queue once the attempts run out; malformed messages are raised as
+        MalformedMessageError and dead-lettered without retries.
+        """
+        error = self.consume_messages([message])[0]
+        if error is not None:
+            raise error
+
+    def consume_messages(self, messages):
+        """
+        Decode and process a batch of consumed messages together.
+        Returns one entry per message: None if it was consumed, otherwise the exception it failed with.
+        """
+        errors = [None] * len(messages)
+        decoded = []
+        for index, message in enumerate(messages):
             # Handle message decoding
             if not message:
                 logger.warning("Received empty message, skipping...")
-                return
-                
-            loaded_message_data = json.loads(message)
-            raw_message_data = RawMessageData(
-                post_creation_time=datetime.fromisoformat(loaded_message_data['post_creation_time']),
-                scrapped_creation_time=datetime.fromisoformat(loaded_message_data['scrapped_creation_time']),
-                channel_id=loaded_message_data['channel_id'],
-                channel_name=loaded_message_data['channel_name'],
-                message_text=loaded_message_data['message_text'].strip()
-            )
-            logger.info(f"Retrieved RawMessageDate from consumed message: {raw_message_data}")
-
-            # Process message with error handling
+                continue
+
+            try:
+                decoded.append((index, self.decode_message(message)))
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to decode JSON from message content: {e}")
+                errors[index] = MalformedMessageError(f"Invalid JSON: {e}")
+            except KeyError as e:
+                logger.error(f"Missing required field in message: {e}")
+                errors[index] = MalformedMessageError(f"Missing required field: {e}")
+            except Exception as e:
+                # Decoding depends only on the body, a retry would fail the same way
+                logger.error(f"Unexpected error decoding the message: {e}")
+                errors[index] = MalformedMessageError(f"{type(e).__name__}: {e}")
+
+        if decoded:
             try:
-                self.message_processor.process_message(raw_message_data)
+                processing_errors = self.message_processor.process_messages([message for _, message in decoded])
             except Exception as e:
-                logger.error(f"Error processing the message: {e}")
-                # Don't re-raise to prevent application crash
-
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to decode JSON from message content: {e}")
-        except KeyError as e:
-            logger.error(f"Missing required field in message: {e}")
-        except Exception as e:
-            logger.error(f"Unexpected error processing the message: {e}")
-            # Don't re-raise to prevent application crash
+                logger.error(f"Error processing the messages: {e}")
+                processing_errors = [e] * len(decoded)
+            for (index, _), error in zip(decoded, processing_errors):
+                if error is not None:
+                    logger.error(f"Error processing the message: {error}")
+                errors[index] = error
+        return errors
+
+    def decode_message(self, message):
+        """Return (raw_message_data, previous_results, previous_fingerprints) decoded from the message body."""
+        loaded_message_data = json.loads(message)
+
+        # Previously processed messages (FullMessageData) are sent back for incremental reprocessing
+        previous_results = None
+        previous_fingerprints = None
+        if 'raw_message_data' in loaded_message_data:
+            previous_results = loaded_message_data.get('processed_message_data')
+            previous_fingerprints = loaded_message_data.get('extractor_fingerprints')
+            loaded_message_data = loaded_message_data['raw_message_data']
+
+        raw_message_data = RawMessageData.from_dict(loaded_message_data)
+        logger.info(f"Retrieved RawMessageDate from consumed message: {raw_message_data}")
+        return raw_message_data, previous_results, previous_fingerprints
@@ -1,58 +1,339 @@
-import json
 import logging
 
-from data.message_data import FullMessageData, ProcessedMessageData
+from data.message_data import FullMessageData, ProcessedMessageData, EnrichmentRequestData, EnrichmentUpdateData, \
+    StoredMessageData
+from service.duplicate_detection_service import DuplicateMatch
+from service.field_extractor_service import default_field_value
 
 logger = logging.getLogger(__name__)
 
 
 class DefaultMessageProcessor:
-    def __init__(self, extraction_service, message_producer):
+    def __init__(self, extraction_service, message_producer, duplicate_detection_service=None,
+                 enrichment_producer=None, deferred_fields=(), idempotency_service=None):
         self.extraction_service = extraction_service
         self.message_producer = message_producer
+        self.duplicate_detection_service = duplicate_detection_service
+        # In two-phase mode the deferred (slow) fields are extracted by enrichment workers and published later
+        self.enrichment_producer = enrichment_producer
+        self.deferred_fields = list(deferred_fields) if enrichment_producer else []
+        # Remembers published messages, so redeliveries are not extracted and published again
+        self.idempotency_service = idempotency_service
 
-    def process_message(self, raw_message_data):
+    def extract_message_fields(self, raw_message_data, message_text, previous_results=None, previous_fingerprints=None):
+        """
+        Extract the fields of the message, reusing previous or near-duplicate results where fingerprints allow.
+        Returns the extraction results, the fingerprints of the extractors that produced them, the duplicate match and
+        the signature to index the message under once its output is published (None if it must not be indexed).
+        """
+        return self.extract_messages_fields([raw_message_data], [message_text], [previous_results],
+                                            [previous_fingerprints])[0]
+
+    def extract_messages_fields(self, raw_messages, message_texts, previous_results_list, previous_fingerprints_list):
+        """Batched version of extract_message_fields, the extractors process all messages of the batch at once."""
+        previous_results_list = [dict(previous_results or {}) for previous_results in previous_results_list]
+        previous_fingerprints_list = [dict(previous_fingerprints or {}) for previous_fingerprints in previous_fingerprints_list]
+
+        # Normalize once per message, the normalized view is shared by duplicate detection and extractors
+        normalized_texts = []
+        for message_text in message_texts:
+            try:
+                normalized_texts.append(self.extraction_service.normalize_text(message_text))
+            except Exception as e:
+                logger.error(f"Error during text normalization: {str(e)}")
+                normalized_texts.append(message_text)
+
+        # Reuse extraction results of an already processed cross-post of the same message
+        signatures = [None] * len(raw_messages)
+        duplicate_matches = [None] * len(raw_messages)
+        field_names = set(self.extraction_service.field_names)
+        for index, normalized_text in enumerate(normalized_texts):
+            if not self.duplicate_detection_service or not field_names - set(previous_results_list[index]):
+                continue
+            try:
+                signatures[index] = self.duplicate_detection_service.signature(normalized_text)
+                duplicate_matches[index] = self.duplicate_detection_service.find_duplicate(
+                    signatures[index], raw_messages[index].message_id)
+            except Exception as e:
+                logger.error(f"Error during duplicate detection: {str(e)}")
+                signatures[index] = None
+
+            duplicate_match = duplicate_matches[index]
+            if duplicate_match:
+                logger.info(f"Message is a near-duplicate of {duplicate_match.as_dict()}, reusing its extraction results")
+                previous_results_list[index] = {**duplicate_match.extraction_results, **previous_results_list[index]}
+                previous_fingerprints_list[index] = {**duplicate_match.extractor_fingerprints,
+                                                     **previous_fingerprints_list[index]}
+
+        # Cross-posts within the batch are not indexed yet, they reuse the results of their earliest copy
+        batch_originals = [None] * len(raw_messages)
+        candidates = [index for index, signature in enumerate(signatures)
+                      if signature is not None and not duplicate_matches[index]]
+        for position, index in enumerate(candidates):
+            earlier = [candidate for candidate in candidates[:position] if batch_originals[candidate] is None
+                       and raw_messages[candidate].message_id != raw_messages[index].message_id]
+            try:
+                similar = self.duplicate_detection_service.find_similar(
+                    signatures[index], [signatures[candidate] for candidate in earlier])
+            except Exception as e:
+                logger.error(f"Error during duplicate detection: {str(e)}")
+                similar = None
+            if similar:
+                batch_originals[index] = (earlier[similar[0]], similar[1])
+
+        # The originals are extracted first, their in-batch copies then only run the extractors they don't cover
+        extracted = [None] * len(raw_messages)
+        self.extract_fields(
+            [index for index, original in enumerate(batch_originals) if original is None], extracted,
+            message_texts, previous_results_list, previous_fingerprints_list, normalized_texts)
+        copies = []
+        for index, original in enumerate(batch_originals):
+            if original is None:
+                continue
+            original_index, similarity = original
+            original_results, original_fingerprints = extracted[original_index]
+            # Same rule as for indexing, failed fields of the original are never copied
+            if set(original_fingerprints) == set(original_results):
+                duplicate_matches[index] = DuplicateMatch.of_message(
+                    raw_messages[original_index], similarity, original_results, original_fingerprints)
+                logger.info(f"Message is a near-duplicate of {duplicate_matches[index].as_dict()} in the same batch, "
+                            f"reusing its extraction results")
+                previous_results_list[index] = {**original_results, **previous_results_list[index]}
+                previous_fingerprints_list[index] = {**original_fingerprints, **previous_fingerprints_list[index]}
+            copies.append(index)
+        self.extract_fields(copies, extracted, message_texts, previous_results_list, previous_fingerprints_list,
+                            normalized_texts)
+
+        results = []
+        for signature, duplicate_match, (extraction_results, extractor_fingerprints) in zip(
+                signatures, duplicate_matches, extracted):
+            # Only fully extracted messages are indexed, so failed fields are never copied to duplicates
+            if duplicate_match or set(extractor_fingerprints) != set(extraction_results):
+                signature = None
+            results.append((extraction_results, extractor_fingerprints, duplicate_match, signature))
+        return results
+
+    def extract_fields(self, indices, extracted, message_texts, previous_results_list, previous_fingerprints_list,
+                       normalized_texts):
+        """Extract the fields of the messages at the given indices into extracted, with error handling."""
+        if not indices:
+            return
         try:
+            results = self.extraction_service.extract_fields_batch_with_fingerprints(
+                [message_texts[index] for index in indices], [previous_results_list[index] for index in indices],
+                [previous_fingerprints_list[index] for index in indices], [normalized_texts[index] for index in indices])
+        except Exception as e:
+            logger.error(f"Error during field extraction: {str(e)}")
+            # Provide default extraction results
+            results = [(self.extraction_service.default_results(), {}) for _ in indices]
+        for index, result in zip(indices, results):
+            extracted[index] = result
+
+    def process_message(self, raw_message_data, previous_results=None, previous_fingerprints=None):
+        error = self.process_messages([(raw_message_data, previous_results, previous_fingerprints)])[0]
+        if error is not None:
+            raise error
+
+    def process_messages(self, messages):
+        """
+        Process a batch of (raw_message_data, previous_results, previous_fingerprints) tuples.
+        Returns one entry per message: None if it was processed, otherwise the exception it failed with.
+        """
+        errors = [None] * len(messages)
+        batch = []
+        for index, (raw_message_data, previous_results, previous_fingerprints) in enumerate(messages):
             message_text = raw_message_data.message_text.strip() if raw_message_data.message_text else ""
             if not message_text:
                 logger.error("Field 'message_text' is empty or missing in the raw data.")
-                return
+                continue
+            batch.append((index, message_text))
+
+        fingerprints = self.extraction_service.fingerprints() if self.idempotency_service else None
+        if batch and self.idempotency_service:
+            batch = self.skip_completed_messages(messages, batch, fingerprints, errors)
+
+        published = {}
+        indexable = {}
+        if batch:
+            try:
+                extracted = self.extract_messages_fields(
+                    [messages[index][0] for index, _ in batch], [message_text for _, message_text in batch],
+                    [messages[index][1] for index, _ in batch], [messages[index][2] for index, _ in batch])
+            except Exception as e:
+                logger.error(f"Error during message processing: {str(e)}")
+                for index, _ in batch:
+                    errors[index] = e
+                return errors
+
+            for (index, _), (extraction_results, extractor_fingerprints, duplicate_match, signature) in zip(
+                    batch, extracted):
+                raw_message_data, previous_results, previous_fingerprints = messages[index]
+                if signature is not None:
+                    indexable[index] = (signature, extraction_results, extractor_fingerprints)
+                checkpoints = self.checkpoint_producers()
+                try:
+                    published[index] = self.publish_results(raw_message_data, extraction_results,
+                                                            extractor_fingerprints, duplicate_match,
+                                                            previous_results, previous_fingerprints)
+                except Exception as e:
+                    logger.error(f"Error during message processing: {str(e)}")
+                    # Buffered records of the failed message would otherwise be flushed while it is retried
+                    self.rollback_producers(checkpoints)
+                    # Returned so the message is retried and dead-lettered instead of silently dropped
+                    errors[index] = e
+
+        # Buffered output has to be published before the batch is acknowledged
+        try:
+            self.flush_producers()
+        except Exception as e:
+            logger.error(f"Error flushing produced messages: {str(e)}")
+            self.reset_producers()
+            for index, _ in batch:
+                if errors[index] is None:
+                    errors[index] = e
+            return errors
 
-            # Extract fields with error handling
+        # Indexed only once published, so a retried message is never matched against itself
+        self.remember_messages(messages, indexable, errors)
+        if self.idempotency_service:
+            self.mark_completed_messages(messages, published, fingerprints, errors)
+        return errors
+
+    def remember_messages(self, messages, indexable, errors):
+        """Index the published messages for near-duplicate detection."""
+        for index, (signature, extraction_results, extractor_fingerprints) in indexable.items():
+            if errors[index] is not None:
+                continue
             try:
-                extraction_results = self.extraction_service.extract_fields(message_text)
+                self.duplicate_detection_service.remember(signature, messages[index][0], extraction_results,
+                                                          extractor_fingerprints)
             except Exception as e:
-                logger.error(f"Error during field extraction: {str(e)}")
-                # Provide default extraction results
-                extraction_results = {
-                    'title': 'Не вдалося витягнути заголовок',
-                    'categories': [],
-                    'format': 'офлайн',
-                    'asap': False
-                }
-
-            processed_data = ProcessedMessageData(
-                title=extraction_results.get('title', 'Не вдалося витягнути заголовок'),
-                categories=extraction_results.get('categories', []),
-                format=extraction_results.get('format', 'офлайн'),
-                asap=extraction_results.get('asap', False)
-            )
-
-            full_message_data = FullMessageData(
-                raw_message_data=raw_message_data,
-                processed_message_data=processed_data
-            )
-
-            logger.info(f"Extracted from RawMessageData following fields: {extraction_results}")
-
-            # Produce message with error handling
+                logger.error(f"Error indexing message for duplicate detection: {str(e)}")
+
+    def skip_completed_messages(self, messages, batch, fingerprints, errors):
+        """
+        Drop the messages the idempotency service already completed from the batch, they are acked
+        without output or with their stored result republished. Returns the remaining batch.
+        """
+        try:
+            completed = self.idempotency_service.find_completed(
+                [messages[index][0].message_id for index, _ in batch], fingerprints)
+        except Exception as e:
+            # The store only saves work, processing the messages again is always safe
+            logger.error(f"Error looking up completed messages: {str(e)}")
+            return batch
+
+        remaining = []
+        for index, message_text in batch:
+            message_id = messages[index][0].message_id
+            if message_id not in completed:
+                remaining.append((index, message_text))
+                continue
+            if not self.idempotency_service.republish_duplicates:
+                logger.info(f"Message {message_id} was already processed, skipping it")
+                continue
+            logger.info(f"Message {message_id} was already processed, republishing its stored result")
             try:
-                self.message_producer.produce_message(full_message_data)
+                self.message_producer.produce_message(StoredMessageData(completed[message_id]))
             except Exception as e:
-                logger.error(f"Error producing message: {str(e)}")
+                logger.error(f"Error republishing stored result: {str(e)}")
+                errors[index] = e
+        return remaining
+
+    def mark_completed_messages(self, messages, published, fingerprints, errors):
+        """Record the messages whose output was published, called only after the producers are flushed."""
+        completed = [(messages[index][0].message_id, result.as_dict())
+                     for index, result in published.items() if errors[index] is None]
+        try:
+            self.idempotency_service.mark_completed(completed, fingerprints)
+        except Exception as e:
+            # The output is already published, at worst a redelivery processes the messages again
+            logger.error(f"Error recording completed messages: {str(e)}")
+
+    def producers(self):
+        return [producer for producer in (self.message_producer, self.enrichment_producer) if producer]
+
+    def flush_producers(self):
+        for producer in self.producers():
+            producer.flush()
+
+    def checkpoint_producers(self):
+        return [producer.checkpoint() for producer in self.producers()]
+
+    def rollback_producers(self, checkpoints):
+        for producer, checkpoint in zip(self.producers(), checkpoints):
+            producer.rollback(checkpoint)
+
+    def reset_producers(self):
+        for producer in self.producers():
+            producer.reset()
 
-        except json.JSONDecodeError:
-            logger.error("Failed to decode JSON from message content.")
+    def publish_results(self, raw_message_data, extraction_results, extractor_fingerprints, duplicate_match,
+                        previous_results, previous_fingerprints):
+        def field_value(field_name):
+            if field_name in self.deferred_fields:
+                return None
+            return extraction_results.get(field_name, default_field_value(field_name))
+
+        processed_data = ProcessedMessageData(
+            title=field_value('title'),
+            categories=field_value('categories'),
+            format=field_value('format'),
+            asap=field_value('asap'),
+            keyphrases=field_value('keyphrases')
+        )
+
+        full_message_data = FullMessageData(
+            raw_message_data=raw_message_data,
+            processed_message_data=processed_data,
+            extractor_fingerprints=extractor_fingerprints,
+            duplicate_of=duplicate_match.as_dict() if duplicate_match else None,
+            pending_fields=self.deferred_fields
+        )
+
+        logger.info(f"Extracted from RawMessageData following fields: {extraction_results}")
+
+        # Produce message with error handling
+        try:
+            self.message_producer.produce_message(full_message_data)
+            if self.enrichment_producer:
+                # Stored and near-duplicate values let the enrichment worker skip unchanged slow fields
+                known_results = {**(duplicate_match.extraction_results if duplicate_match else {}),
+                                 **(previous_results or {})}
+                known_fingerprints = {**(duplicate_match.extractor_fingerprints if duplicate_match else {}),
+                                      **(previous_fingerprints or {})}
+                self.enrichment_producer.produce_message(
+                    EnrichmentRequestData(raw_message_data, known_results, known_fingerprints))
+        except Exception as e:
+            logger.error(f"Error producing message: {str(e)}")
+            raise
+        return full_message_data
+
+
+class DefaultEnrichmentProcessor(DefaultMessageProcessor):
+    """Extracts the slow fields of messages from the enrichment queue and publishes them as follow-up updates."""
+
+    def __init__(self, extraction_service, message_producer, duplicate_detection_service=None,
+                 idempotency_service=None):
+        super().__init__(extraction_service, message_producer, duplicate_detection_service,
+                         idempotency_service=idempotency_service)
+
+    def process_messages(self, messages):
+        # Only values of the fields this worker extracts are relevant here
+        field_names = set(self.extraction_service.field_names)
+        messages = [(raw_message_data,
+                     {k: v for k, v in (previous_results or {}).items() if k in field_names},
+                     previous_fingerprints)
+                    for raw_message_data, previous_results, previous_fingerprints in messages]
+        return super().process_messages(messages)
+
+    def publish_results(self, raw_message_data, extraction_results, extractor_fingerprints, duplicate_match,
+                        previous_results, previous_fingerprints):
+        logger.info(f"Enriched message {raw_message_data.message_id} with fields: {extraction_results}")
+        update_data = EnrichmentUpdateData(raw_message_data, extraction_results, extractor_fingerprints)
+        try:
+            self.message_producer.produce_message(update_data)
         except Exception as e:
-            logger.error(f"Error during message processing: {str(e)}")
-            # Don't re-raise the exception to prevent application crash
+            logger.error(f"Error producing enrichment update: {str(e)}")
+            raise
+        return update_data
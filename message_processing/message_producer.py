@@ -1,18 +1,49 @@
 import json
 import logging
 
+from client.rabbitmq_client import PublishError
+
 logger = logging.getLogger(__name__)
 
 
 class DefaultMessageProducer:
+    """
+    Hands every produced message to the publisher threads right away and keeps processing. Flush waits for their
+    confirms, which has to happen before the consumed messages are acknowledged.
+    """
+
     def __init__(self, rabbit_client, queue_name):
         self.rabbit_client = rabbit_client
         self.queue_name = queue_name
+        self._in_flight = []
 
     def produce_message(self, full_message):
         try:
             full_message_json = json.dumps(full_message.as_dict())
-            self.rabbit_client.produce_message(full_message_json, self.queue_name)
-            logger.info(f"Produced message to queue '{self.queue_name}': {full_message_json}")
+            self._in_flight.append(self.rabbit_client.produce_message_async(full_message_json, self.queue_name))
+            logger.info(f"Producing message to queue '{self.queue_name}': {full_message_json}")
         except Exception as e:
             logger.error(f"Failed to send message to queue '{self.queue_name}': {str(e)}")
+            raise
+
+    def checkpoint(self):
+        """Return a marker of the unconfirmed messages, to roll back the messages of a message that failed"""
+        return len(self._in_flight)
+
+    def rollback(self, checkpoint):
+        """Cancel the messages produced since the checkpoint that no publisher thread has taken yet"""
+        for future in self._in_flight[checkpoint:]:
+            future.cancel()
+        del self._in_flight[checkpoint:]
+
+    def flush(self):
+        """Wait for the confirms of the produced messages, raises PublishError if any of them was not published"""
+        in_flight, self._in_flight = self._in_flight, []
+        failed = sum(1 for future in in_flight if not future.result())
+        if failed:
+            logger.error(f"Failed to send {failed} of {len(in_flight)} messages to queue '{self.queue_name}'")
+            raise PublishError(f"RabbitMQ client could not publish {failed} messages to queue '{self.queue_name}'")
+
+    def reset(self):
+        """Cancel the unconfirmed messages, used when their consumed messages are failed and will be redelivered"""
+        self.rollback(0)
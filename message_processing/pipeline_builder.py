@@ -0,0 +1,129 @@
+"""
+Wiring of the RabbitMQ client and the message processing pipeline from the loaded config, shared by main.py and the
+load test harness in benchmarks/. Call config.load_config() first; the NLP models and extractors are set up by the
+caller and passed in through the extraction service.
+"""
+
+from dataclasses import dataclass
+
+import pika
+
+import config
+from client.rabbitmq_client import DefaultRabbitMQClient
+from message_processing.batch_controller import DefaultBatchController
+from message_processing.envelope_message_producer import DefaultEnvelopeMessageProducer
+from message_processing.message_consumer import DefaultMessageConsumer
+from message_processing.message_processor import DefaultMessageProcessor, DefaultEnrichmentProcessor
+from message_processing.message_producer import DefaultMessageProducer
+from service.duplicate_detection_service import DefaultDuplicateDetectionService
+from service.idempotency_service import DefaultIdempotencyService
+
+
+@dataclass
+class WorkerRole:
+    """Which phase of the processing this worker runs and which queue it consumes."""
+    two_phase: bool
+    enrichment_worker: bool
+    consumed_queue_name: str
+
+    @property
+    def needs_lemmatization(self):
+        return not self.enrichment_worker
+
+    @property
+    def needs_generation(self):
+        return not self.two_phase or self.enrichment_worker
+
+
+@dataclass
+class MessagePipeline:
+    message_processor: DefaultMessageProcessor
+    message_consumer: DefaultMessageConsumer
+    batch_controller: DefaultBatchController
+    idempotency_service: DefaultIdempotencyService | None = None
+
+    def close(self):
+        if self.idempotency_service:
+            self.idempotency_service.close()
+
+
+def worker_role():
+    """In two-phase mode processor workers extract the fast fields and enrichment workers generate titles"""
+    two_phase = config.PROCESSING_MODE == config.TWO_PHASE_MODE
+    enrichment_worker = two_phase and config.WORKER_ROLE == config.ENRICHMENT_WORKER_ROLE
+    consumed_queue_name = config.RABBIT_ENRICHMENT_QUEUE_NAME if enrichment_worker else config.RABBIT_RAW_QUEUE_NAME
+    return WorkerRole(two_phase, enrichment_worker, consumed_queue_name)
+
+
+def build_rabbit_client(queue_name, connection_factory=pika.BlockingConnection):
+    return DefaultRabbitMQClient(queue_name, config.RABBIT_DELIVERY_MODE, config.RABBIT_HOST, config.RABBIT_PORT,
+                                 config.RABBIT_USERNAME, config.RABBIT_PASSWORD, config.RABBIT_MAX_RETRIES,
+                                 config.RABBIT_RETRY_DELAY, config.RABBIT_USE_SSL, config.RABBIT_VIRTUAL_HOST,
+                                 config.RABBIT_DEAD_LETTER_QUEUE_NAME, config.RABBIT_MAX_DELIVERY_ATTEMPTS,
+                                 config.RABBIT_PUBLISHER_POOL_SIZE, connection_factory)
+
+
+def build_message_pipeline(rabbit_client, extraction_service, metrics_registry, role):
+    """Create the producers, the processor for the worker's role, the consumer and the batch controller"""
+    if config.PROCESSED_OUTPUT_FORMAT == config.ENVELOPE_OUTPUT_FORMAT:
+        message_producer = DefaultEnvelopeMessageProducer(rabbit_client, config.RABBIT_PROCESSED_QUEUE_NAME,
+                                                          config.ENVELOPE_MAX_RECORDS, config.ENVELOPE_MAX_BYTES,
+                                                          config.ENVELOPE_COMPRESSION)
+    else:
+        message_producer = DefaultMessageProducer(rabbit_client, config.RABBIT_PROCESSED_QUEUE_NAME)
+
+    duplicate_detection_service = None
+    if config.DUPLICATE_DETECTION_ENABLED:
+        duplicate_detection_service = DefaultDuplicateDetectionService(
+            config.DUPLICATE_SIMILARITY_THRESHOLD, config.DUPLICATE_WINDOW_SECONDS, config.DUPLICATE_MAX_ENTRIES,
+            config.DUPLICATE_MINHASH_PERMUTATIONS, config.DUPLICATE_LSH_BANDS, config.DUPLICATE_SHINGLE_SIZE)
+    idempotency_service = None
+    if config.IDEMPOTENCY_ENABLED:
+        idempotency_service = DefaultIdempotencyService(
+            config.IDEMPOTENCY_DB_PATH, config.IDEMPOTENCY_TTL_SECONDS,
+            config.IDEMPOTENCY_DUPLICATE_ACTION == config.REPUBLISH_DUPLICATE_ACTION)
+        metrics_registry.register(idempotency_service.metrics)
+
+    if role.enrichment_worker:
+        message_processor = DefaultEnrichmentProcessor(extraction_service, message_producer,
+                                                       duplicate_detection_service, idempotency_service)
+    elif role.two_phase:
+        enrichment_producer = DefaultMessageProducer(rabbit_client, config.RABBIT_ENRICHMENT_QUEUE_NAME)
+        deferred_fields = [config.TITLE_LABEL, config.KEYPHRASES_LABEL] if config.KEYPHRASE_GENERATION_ENABLED \
+            else [config.TITLE_LABEL]
+        message_processor = DefaultMessageProcessor(extraction_service, message_producer,
+                                                    duplicate_detection_service, enrichment_producer,
+                                                    deferred_fields, idempotency_service)
+    else:
+        message_processor = DefaultMessageProcessor(extraction_service, message_producer,
+                                                    duplicate_detection_service,
+                                                    idempotency_service=idempotency_service)
+    message_consumer = DefaultMessageConsumer(message_processor)
+
+    batch_controller = DefaultBatchController(config.BATCH_SIZE_MIN, config.BATCH_SIZE_MAX, config.PREFETCH_COUNT_MAX,
+                                              config.BATCH_MAX_WAIT_MS / 1000, config.TARGET_P95_LATENCY_SECONDS,
+                                              config.ADAPTIVE_BATCHING_ENABLED)
+    metrics_registry.register(batch_controller.metrics)
+    return MessagePipeline(message_processor, message_consumer, batch_controller, idempotency_service)
+
+
+def register_message_pipeline(rabbit_client, pipeline, role, memory_monitor=None, candidate_reload_service=None):
+    """Register the batch consumer, the periodic callbacks and the recycling limits, ready for start_consuming"""
+    rabbit_client.register_batch_consumer(pipeline.message_consumer.consume_messages, role.consumed_queue_name,
+                                          pipeline.batch_controller)
+    rabbit_client.add_periodic_callback(config.BATCH_CONTROLLER_INTERVAL_SECONDS, rabbit_client.adjust_batching)
+    if candidate_reload_service:
+        # Swapped between batches on the processing thread, so no batch mixes old and new candidates
+        rabbit_client.add_periodic_callback(config.CANDIDATES_RELOAD_INTERVAL_SECONDS,
+                                            candidate_reload_service.reload_if_changed, between_batches=True)
+    if pipeline.idempotency_service:
+        pipeline.idempotency_service.purge_expired()
+        rabbit_client.add_periodic_callback(config.IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+                                            pipeline.idempotency_service.purge_expired, between_batches=True)
+
+    if memory_monitor:
+        # Recycle the worker before it grows into an OOM kill in the middle of a message
+        memory_monitor.set_limits(config.MEMORY_RSS_LIMIT_MB, config.MAX_MESSAGES_PER_WORKER)
+        memory_monitor.sample_interval = config.MEMORY_SAMPLE_INTERVAL_SECONDS
+        rabbit_client.add_stop_condition(memory_monitor.check)
+        rabbit_client.add_periodic_callback(config.MEMORY_SAMPLE_INTERVAL_SECONDS, memory_monitor.sample)
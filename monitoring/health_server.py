@@ -0,0 +1,87 @@
+import json
+import logging
+import socketserver
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+logger = logging.getLogger(__name__)
+
+
+class HealthCheckHandler(BaseHTTPRequestHandler):
+    metrics_registry = None
+    memory_monitor = None
+    profiler = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == '/health':
+            self.send_text(200, b'OK')
+        elif url.path == '/metrics' and self.metrics_registry is not None:
+            self.send_text(200, self.metrics_registry.render_prometheus().encode('utf-8'),
+                           'text/plain; version=0.0.4')
+        elif url.path == '/memory' and self.memory_monitor is not None:
+            self.send_text(200, json.dumps(self.memory_monitor.status()).encode('utf-8'), 'application/json')
+        elif url.path.startswith('/debug/') and self.profiler is not None:
+            self.handle_debug(url.path, query)
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def handle_debug(self, path, query):
+        token = query.get('token')
+        authorization = self.headers.get('Authorization', '')
+        if authorization.startswith('Bearer '):
+            token = authorization[len('Bearer '):]
+        if not self.profiler.is_authorized(self.client_address[0], token):
+            self.send_text(403, b'Forbidden')
+            return
+
+        if path == '/debug/threads':
+            self.send_text(200, self.profiler.dump_threads().encode('utf-8'))
+        elif path == '/debug/profile':
+            try:
+                seconds = float(query.get('seconds', 10))
+                interval = float(query.get('interval_ms', 10)) / 1000
+            except ValueError:
+                self.send_text(400, b'seconds and interval_ms must be numbers')
+                return
+            try:
+                stacks = self.profiler.profile(seconds, interval, query.get('thread'))
+            except LookupError as e:
+                self.send_text(404, str(e).encode('utf-8'))
+                return
+            except RuntimeError as e:
+                self.send_text(409, str(e).encode('utf-8'))
+                return
+            self.send_text(200, stacks.encode('utf-8'))
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def send_text(self, status, body, content_type='text/plain'):
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Health checks and metric scrapes are frequent, keep them out of the INFO logs
+        logger.debug(format % args)
+
+
+class _HealthServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_health_server(metrics_registry=None, port=8080, memory_monitor=None, profiler=None):
+    """Start a simple HTTP server for health checks, metrics, the memory trend and the debug endpoints"""
+    handler = type('BoundHealthCheckHandler', (HealthCheckHandler,),
+                   {'metrics_registry': metrics_registry, 'memory_monitor': memory_monitor, 'profiler': profiler})
+    try:
+        with _HealthServer(("", port), handler) as httpd:
+            print(f"Health check server started on port {port}")
+            httpd.serve_forever()
+    except Exception as e:
+        print(f"Failed to start health server: {e}")
@@ -0,0 +1,131 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+STATM_PATH = '/proc/self/statm'
+
+
+def read_rss_bytes():
+    """Return the resident set size of this process, None if it can't be read on this platform"""
+    try:
+        with open(STATM_PATH) as statm:
+            # Second field is the number of resident pages
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    if resource is not None:
+        # Only the peak is available here, kilobytes on Linux and bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if os.uname().sysname == 'Darwin' else max_rss * 1024
+    return None
+
+
+class DefaultMemoryMonitor:
+    """
+    Tracks the RSS and the number of processed messages of the worker and tells when it should be recycled.
+    Samples are kept at most every sample_interval seconds to show the memory trend.
+    """
+
+    def __init__(self, rss_limit_mb=0, max_messages=0, sample_interval=60, history_size=240):
+        self.rss_limit_bytes = None
+        self.max_messages = None
+        self.set_limits(rss_limit_mb, max_messages)
+        self.sample_interval = sample_interval
+        self.started_at = time.time()
+        self.messages_processed = 0
+        self.rss_bytes = None
+        self.peak_rss_bytes = None
+        self._history = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self.sample()
+
+    def set_limits(self, rss_limit_mb, max_messages):
+        """Set the limits, 0 disables a limit"""
+        self.rss_limit_bytes = rss_limit_mb * 1024 * 1024 if rss_limit_mb else None
+        self.max_messages = max_messages or None
+
+    def sample(self):
+        """Read the current RSS, returns it in bytes"""
+        rss_bytes = read_rss_bytes()
+        if rss_bytes is None:
+            return None
+        now = time.time()
+        with self._lock:
+            self.rss_bytes = rss_bytes
+            self.peak_rss_bytes = max(self.peak_rss_bytes or 0, rss_bytes)
+            if not self._history or now - self._history[-1][0] >= self.sample_interval:
+                self._history.append((now, rss_bytes, self.messages_processed))
+        return rss_bytes
+
+    def record_messages(self, count):
+        with self._lock:
+            self.messages_processed += count
+
+    def check(self, message_count):
+        """Record processed messages and return why the worker should be recycled, None while within its limits"""
+        self.record_messages(message_count)
+        return self.recycle_reason()
+
+    def recycle_reason(self):
+        rss_bytes = self.sample()
+        if self.rss_limit_bytes and rss_bytes is not None and rss_bytes >= self.rss_limit_bytes:
+            return f"RSS {rss_bytes / 1048576:.0f} MB reached the limit of {self.rss_limit_bytes / 1048576:.0f} MB"
+        if self.max_messages and self.messages_processed >= self.max_messages:
+            return f"processed {self.messages_processed} messages, the limit is {self.max_messages}"
+        return None
+
+    def growth_bytes_per_hour(self):
+        """Least-squares slope of the RSS samples, None until there are two samples"""
+        with self._lock:
+            history = list(self._history)
+        if len(history) < 2:
+            return None
+        mean_time = sum(sample_time for sample_time, _, _ in history) / len(history)
+        mean_rss = sum(rss for _, rss, _ in history) / len(history)
+        variance = sum((sample_time - mean_time) ** 2 for sample_time, _, _ in history)
+        if not variance:
+            return None
+        covariance = sum((sample_time - mean_time) * (rss - mean_rss) for sample_time, rss, _ in history)
+        return covariance / variance * 3600
+
+    def status(self):
+        """Current memory state and trend, as served on /memory"""
+        self.sample()
+        with self._lock:
+            history = list(self._history)
+        growth = self.growth_bytes_per_hour()
+        return {
+            'rss_mb': round(self.rss_bytes / 1048576, 1) if self.rss_bytes is not None else None,
+            'peak_rss_mb': round(self.peak_rss_bytes / 1048576, 1) if self.peak_rss_bytes is not None else None,
+            'rss_limit_mb': round(self.rss_limit_bytes / 1048576) if self.rss_limit_bytes else None,
+            'growth_mb_per_hour': round(growth / 1048576, 2) if growth is not None else None,
+            'messages_processed': self.messages_processed,
+            'max_messages': self.max_messages,
+            'uptime_seconds': round(time.time() - self.started_at),
+            'samples': [{'time': round(sample_time), 'rss_mb': round(rss / 1048576, 1), 'messages': messages}
+                        for sample_time, rss, messages in history]
+        }
+
+    def metrics(self):
+        return [
+            ("process_rss_bytes", None, self.sample()),
+            ("process_peak_rss_bytes", None, self.peak_rss_bytes),
+            ("process_rss_limit_bytes", None, self.rss_limit_bytes),
+            ("process_rss_growth_bytes_per_hour", None, self.growth_bytes_per_hour()),
+        ]
@@ -0,0 +1,43 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class DefaultMetricsRegistry:
+    """
+    Collects metrics from registered providers and renders them in the Prometheus text format.
+    A provider is a callable returning (name, labels, value) tuples, labels being a dict or None.
+    """
+
+    def __init__(self, prefix="uopp_"):
+        self.prefix = prefix
+        self._providers = []
+        self._lock = threading.Lock()
+
+    def register(self, provider):
+        with self._lock:
+            self._providers.append(provider)
+
+    def collect(self):
+        with self._lock:
+            providers = list(self._providers)
+
+        metrics = []
+        for provider in providers:
+            try:
+                metrics.extend(provider())
+            except Exception as e:
+                logger.warning(f"Failed to collect metrics from {provider}: {e}")
+        return metrics
+
+    def render_prometheus(self):
+        lines = []
+        for name, labels, value in self.collect():
+            if value is None:
+                continue
+            label_text = ''
+            if labels:
+                label_text = '{' + ','.join(f'{key}="{label_value}"' for key, label_value in labels.items()) + '}'
+            lines.append(f"{self.prefix}{name}{label_text} {float(value):g}")
+        return '\n'.join(lines) + '\n'
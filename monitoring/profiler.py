@@ -0,0 +1,105 @@
+import hmac
+import logging
+import os
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+STDLIB_PATH = sysconfig.get_paths()['stdlib']
+
+
+def frame_label(frame):
+    """Label of a stack frame in collapsed stacks: function and shortened file name"""
+    filename = frame.f_code.co_filename
+    site_packages = filename.rfind('site-packages' + os.sep)
+    if site_packages >= 0:
+        filename = filename[site_packages + len('site-packages') + 1:]
+    elif filename.startswith(STDLIB_PATH + os.sep):
+        filename = filename[len(STDLIB_PATH) + 1:]
+    elif filename.startswith(os.getcwd() + os.sep):
+        filename = os.path.relpath(filename)
+    return f"{frame.f_code.co_name} ({filename})"
+
+
+def collapse_stack(frame):
+    """Return the stack of the frame in collapsed format, outermost frame first"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class DefaultProfiler:
+    """
+    On-demand sampling profiler for the health server. Nothing runs until a profile is requested, then the stack of
+    the profiled thread (the consumer runs on the main thread) is sampled from the request's own thread.
+    Requests need the token when one is set, otherwise they are only accepted from localhost.
+    """
+
+    def __init__(self, token=None, max_seconds=60, thread_name='MainThread'):
+        self.token = token
+        self.max_seconds = max_seconds
+        self.thread_name = thread_name
+        self._running = threading.Lock()
+
+    def is_authorized(self, client_host, provided_token):
+        if self.token:
+            return provided_token is not None and hmac.compare_digest(provided_token, self.token)
+        return client_host in LOCAL_ADDRESSES
+
+    def find_thread(self, thread_name=None):
+        thread_name = thread_name or self.thread_name
+        for thread in threading.enumerate():
+            if thread.name == thread_name:
+                return thread
+        return None
+
+    def profile(self, seconds, interval, thread_name=None):
+        """
+        Sample the thread's stack every interval seconds for the given duration and return collapsed stacks
+        ("frame;frame;frame count" per line), ready for flamegraph.pl or speedscope.
+        """
+        seconds = min(max(seconds, 0.1), self.max_seconds)
+        interval = min(max(interval, 0.001), 1.0)
+        thread = self.find_thread(thread_name)
+        if thread is None:
+            raise LookupError(f"No thread named '{thread_name or self.thread_name}'")
+        if not self._running.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+
+        try:
+            logger.info(f"Profiling thread '{thread.name}' for {seconds}s every {interval * 1000:.0f}ms")
+            stacks = Counter()
+            samples = 0
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                frame = sys._current_frames().get(thread.ident)
+                if frame is None:
+                    break
+                stacks[collapse_stack(frame)] += 1
+                samples += 1
+                del frame
+                time.sleep(interval)
+            logger.info(f"Profile of thread '{thread.name}' finished with {samples} samples")
+        finally:
+            self._running.release()
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def dump_threads(self):
+        """Return the current stack of every thread"""
+        frames = sys._current_frames()
+        dump = []
+        for thread in threading.enumerate():
+            frame = frames.get(thread.ident)
+            dump.append(f"Thread '{thread.name}' (id {thread.ident}, daemon {thread.daemon}):\n")
+            if frame is not None:
+                dump.extend(traceback.format_stack(frame))
+            dump.append("\n")
+        return ''.join(dump)
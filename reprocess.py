@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Script to send an archive of processed messages back through the data processor.
+Each line of the archive is a processed message (FullMessageData JSON) as published to the processed queue.
+Workers recompute only the fields whose extractor fingerprint has changed and reuse stored values for the rest.
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+import config
+from client.rabbitmq_client import DefaultRabbitMQClient
+
+logger = logging.getLogger(__name__)
+
+
+def reprocess_archive(archive_path, rabbit_client, queue_name):
+    """Publish every archived processed message to the queue, returns the number of published messages."""
+    published = 0
+    with open(archive_path, encoding='utf-8') as archive:
+        for line_number, line in enumerate(archive, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                full_message = json.loads(line)
+                if 'raw_message_data' not in full_message:
+                    raise KeyError('raw_message_data')
+            except (json.JSONDecodeError, KeyError) as e:
+                logger.warning(f"Skipping invalid archive line {line_number}: {e}")
+                continue
+
+            if rabbit_client.produce_message(json.dumps(full_message), queue_name):
+                published += 1
+            else:
+                logger.error(f"Failed to publish archive line {line_number}, stopping.")
+                break
+    return published
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reprocess an archive of processed messages.")
+    parser.add_argument("archive", help="path to a JSON lines file with processed messages")
+    parser.add_argument("--queue", help="queue to publish to (defaults to RABBIT_RAW_QUEUE_NAME)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config.load_config()
+    queue_name = args.queue or config.RABBIT_RAW_QUEUE_NAME
+
+    client = DefaultRabbitMQClient(queue_name, config.RABBIT_DELIVERY_MODE, config.RABBIT_HOST, config.RABBIT_PORT,
+                                   config.RABBIT_USERNAME, config.RABBIT_PASSWORD, config.RABBIT_MAX_RETRIES,
+                                   config.RABBIT_RETRY_DELAY, config.RABBIT_USE_SSL, config.RABBIT_VIRTUAL_HOST)
+    if not client.setup_connection():
+        print("Failed to connect to RabbitMQ")
+        sys.exit(1)
+
+    try:
+        count = reprocess_archive(args.archive, client, queue_name)
+        print(f"Published {count} messages to '{queue_name}' for reprocessing")
+    finally:
+        client.close_connection()
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class DefaultCandidateReloadService:
+    """
+    Loads the candidate lists of lemmatization extractors from a JSON file keyed by field name,
+    e.g. {"categories": [...], "asap": [...]}, and swaps in new lemma tables whenever the file changes.
+    Fields missing from the file keep their current candidates.
+    """
+
+    def __init__(self, candidates_file, extractors):
+        self.candidates_file = candidates_file
+        self.extractors = {extractor.field_name: extractor for extractor in extractors}
+        self.reloads = 0
+        self.failures = 0
+        self._file_state = None
+        self._file_hash = None
+
+    def read_candidates(self, content):
+        candidates = json.loads(content)
+        if not isinstance(candidates, dict):
+            raise ValueError("the candidates file must contain a JSON object keyed by field name")
+        for field_name, labels in candidates.items():
+            if field_name not in self.extractors:
+                logger.warning(f"Ignoring candidates of unknown field '{field_name}'")
+            elif not isinstance(labels, list) or not all(isinstance(label, str) and label.strip() for label in labels):
+                raise ValueError(f"candidates of '{field_name}' must be a list of non-empty strings")
+        return {field_name: [label.strip() for label in labels]
+                for field_name, labels in candidates.items() if field_name in self.extractors}
+
+    def reload_if_changed(self):
+        """Swap in the candidates of the file if it changed since the last check, returns whether it did"""
+        try:
+            stat = os.stat(self.candidates_file)
+        except OSError as e:
+            if self._file_state is not None:
+                logger.error(f"Candidates file '{self.candidates_file}' is not readable, keeping the current candidates: {e}")
+                self._file_state = None
+            return False
+        file_state = (stat.st_mtime_ns, stat.st_size)
+        if file_state == self._file_state:
+            return False
+        self._file_state = file_state
+
+        try:
+            with open(self.candidates_file, 'rb') as candidates_file:
+                content = candidates_file.read()
+            file_hash = hashlib.sha256(content).hexdigest()
+            if file_hash == self._file_hash:
+                return False
+            candidates = self.read_candidates(content)
+            # All tables are built before any is swapped in, a failure leaves every extractor unchanged
+            tables = {field_name: self.extractors[field_name].build_lemma_table(labels)
+                      for field_name, labels in candidates.items()}
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Failed to load candidates from '{self.candidates_file}', keeping the current candidates: {e}")
+            return False
+
+        for field_name, table in tables.items():
+            self.extractors[field_name].set_lemma_table(table)
+        self._file_hash = file_hash
+        self.reloads += 1
+        logger.info(f"Loaded candidates from '{self.candidates_file}' ({file_hash[:16]}): "
+                    f"{ {field_name: len(table.labels) for field_name, table in tables.items()} }")
+        return True
+
+    def metrics(self):
+        return [
+            ("candidate_reloads_total", None, self.reloads),
+            ("candidate_reload_failures_total", None, self.failures),
+        ]
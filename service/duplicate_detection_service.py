@@ -0,0 +1,185 @@
+import logging
+import re
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+from service.text_normalization_service import DefaultTextNormalizationService
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 31) - 1
+# Links and mentions are stripped with the same patterns as the extractors' normalized view
+_SIGNATURE_NORMALIZATION_STEPS = ('urls', 'mentions')
+_NON_WORD_PATTERN = re.compile(r'[\W_]+')
+
+
+@dataclass
+class DuplicateMatch:
+    message_id: str
+    channel_id: int
+    post_creation_time: str
+    similarity: float
+    extraction_results: dict
+    extractor_fingerprints: dict
+
+    @classmethod
+    def of_message(cls, raw_message_data, similarity, extraction_results, extractor_fingerprints):
+        return cls(
+            message_id=raw_message_data.message_id,
+            channel_id=raw_message_data.channel_id,
+            post_creation_time=raw_message_data.post_creation_time.isoformat(),
+            similarity=similarity,
+            extraction_results=dict(extraction_results),
+            extractor_fingerprints=dict(extractor_fingerprints)
+        )
+
+    def as_dict(self):
+        return {
+            "message_id": self.message_id,
+            "channel_id": self.channel_id,
+            "post_creation_time": self.post_creation_time,
+            "similarity": round(self.similarity, 3)
+        }
+
+
+@dataclass
+class _IndexedMessage:
+    signature: np.ndarray
+    band_keys: list
+    indexed_at: float
+    match: DuplicateMatch
+
+
+class DefaultDuplicateDetectionService:
+    """
+    Finds near-duplicate (cross-posted) messages with MinHash signatures over character shingles
+    and an LSH index of the messages processed within a sliding time window.
+    """
+
+    def __init__(self, similarity_threshold, window_seconds, max_entries, num_permutations=128, bands=32,
+                 shingle_size=5, seed=42):
+        if num_permutations % bands != 0:
+            raise ValueError(f"num_permutations ({num_permutations}) must be divisible by bands ({bands})")
+        self.similarity_threshold = similarity_threshold
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.bands = bands
+        self.rows_per_band = num_permutations // bands
+        self.shingle_size = shingle_size
+        self._text_normalization = DefaultTextNormalizationService(_SIGNATURE_NORMALIZATION_STEPS)
+
+        random_state = np.random.RandomState(seed)
+        self._permutation_a = random_state.randint(1, _MERSENNE_PRIME, size=num_permutations).astype(np.uint64)
+        self._permutation_b = random_state.randint(0, _MERSENNE_PRIME, size=num_permutations).astype(np.uint64)
+
+        self._buckets = {}
+        self._entries = {}
+        self._entry_order = deque()
+        self._next_entry_id = 0
+
+    def normalize(self, text):
+        """Drop links, mentions, emojis and punctuation so that cross-post decorations don't affect the signature."""
+        text = self._text_normalization.normalize(text.lower())
+        return _NON_WORD_PATTERN.sub(' ', text).strip()
+
+    def signature(self, text):
+        """Compute the MinHash signature of the normalized text."""
+        normalized = self.normalize(text)
+        if len(normalized) <= self.shingle_size:
+            shingles = {normalized}
+        else:
+            shingles = {normalized[i:i + self.shingle_size] for i in range(len(normalized) - self.shingle_size + 1)}
+
+        hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) % _MERSENNE_PRIME for shingle in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        permuted = (np.outer(self._permutation_a, hashes) + self._permutation_b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def find_duplicate(self, signature, message_id=None):
+        """
+        Return the most similar message in the window if it reaches the similarity threshold.
+        The message itself (same message_id, e.g. redelivered after it was indexed) is never a match.
+        """
+        self._evict_expired()
+
+        candidate_ids = set()
+        for band_key in self._band_keys(signature):
+            candidate_ids.update(self._buckets.get(band_key, ()))
+
+        best_match = None
+        best_similarity = 0.0
+        for entry_id in candidate_ids:
+            entry = self._entries[entry_id]
+            if message_id is not None and entry.match.message_id == message_id:
+                continue
+            similarity = self.similarity(entry.signature, signature)
+            if similarity >= self.similarity_threshold and similarity > best_similarity:
+                best_match, best_similarity = entry.match, similarity
+
+        if best_match is None:
+            return None
+        return DuplicateMatch(best_match.message_id, best_match.channel_id, best_match.post_creation_time,
+                              best_similarity,
+                              best_match.extraction_results, best_match.extractor_fingerprints)
+
+    def find_similar(self, signature, other_signatures):
+        """
+        Return the position and similarity of the most similar of other_signatures if it reaches the similarity
+        threshold, used for cross-posts within one batch that are not indexed yet.
+        """
+        best_position = None
+        best_similarity = 0.0
+        for position, other_signature in enumerate(other_signatures):
+            similarity = self.similarity(other_signature, signature)
+            if similarity >= self.similarity_threshold and similarity > best_similarity:
+                best_position, best_similarity = position, similarity
+        if best_position is None:
+            return None
+        return best_position, best_similarity
+
+    @staticmethod
+    def similarity(signature, other_signature):
+        """Estimated Jaccard similarity of the shingle sets behind the two signatures."""
+        return float(np.mean(signature == other_signature))
+
+    def remember(self, signature, raw_message_data, extraction_results, extractor_fingerprints):
+        """Index a processed message so that later near-duplicates can reuse its extraction results."""
+        self._evict_expired()
+        while len(self._entries) >= self.max_entries:
+            self._remove_oldest()
+
+        band_keys = self._band_keys(signature)
+        entry_id = self._next_entry_id
+        self._next_entry_id += 1
+        self._entries[entry_id] = _IndexedMessage(
+            signature=signature,
+            band_keys=band_keys,
+            indexed_at=time.monotonic(),
+            match=DuplicateMatch.of_message(raw_message_data, 1.0, extraction_results, extractor_fingerprints)
+        )
+        self._entry_order.append(entry_id)
+        for band_key in band_keys:
+            self._buckets.setdefault(band_key, set()).add(entry_id)
+
+    def _band_keys(self, signature):
+        rows = self.rows_per_band
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def _evict_expired(self):
+        expiry = time.monotonic() - self.window_seconds
+        while self._entry_order and self._entries[self._entry_order[0]].indexed_at < expiry:
+            self._remove_oldest()
+
+    def _remove_oldest(self):
+        entry_id = self._entry_order.popleft()
+        entry = self._entries.pop(entry_id)
+        for band_key in entry.band_keys:
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band_key]
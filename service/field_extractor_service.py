@@ -1,29 +1,137 @@
+import copy
+import hashlib
 import logging
 
+from field_extractor.abstract_field_extractor import NORMALIZED_TEXT_VIEW
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_FIELD_VALUES = {
+    'title': "Не вдалося витягнути заголовок",
+    'categories': [],
+    'format': 'офлайн',
+    'asap': False,
+    'keyphrases': []
+}
+
+
+def default_field_value(field_name):
+    """Return a fresh copy of the value used when a field can't be extracted."""
+    return copy.copy(DEFAULT_FIELD_VALUES.get(field_name))
+
 
 class DefaultFieldsExtractionService:
-    def __init__(self, extractors):
+    def __init__(self, extractors, text_normalization_service=None):
         self.extractors = extractors
+        self.text_normalization_service = text_normalization_service
+
+    def normalize_text(self, text):
+        """Return the normalized view of the text, falling back to the raw text if nothing is left of it."""
+        if not self.text_normalization_service:
+            return text
+        return self.text_normalization_service.normalize(text) or text
+
+    def fingerprint(self, extractor):
+        """Return the version fingerprint of the extractor including the normalization it reads the text through."""
+        if extractor.text_view != NORMALIZED_TEXT_VIEW or not self.text_normalization_service:
+            return extractor.version_fingerprint
+        combined = f"{extractor.version_fingerprint}:{self.text_normalization_service.fingerprint}"
+        return hashlib.sha256(combined.encode('utf-8')).hexdigest()[:16]
+
+    @property
+    def field_names(self):
+        return [field_name for extractor in self.extractors for field_name in extractor.field_names]
+
+    def default_results(self):
+        """Return default values of all fields, used when extraction fails as a whole."""
+        return {field_name: default_field_value(field_name) for field_name in self.field_names}
+
+    def fingerprints(self):
+        """Return the current version fingerprint of every extractor keyed by field name."""
+        return {field_name: self.fingerprint(extractor)
+                for extractor in self.extractors for field_name in extractor.field_names}
 
     def extract_fields(self, text):
-        results = {}
+        results, _ = self.extract_fields_with_fingerprints(text)
+        return results
+
+    def extract_fields_with_fingerprints(self, text, previous_results=None, previous_fingerprints=None,
+                                         normalized_text=None):
+        """
+        Extract all fields, reusing previous values of fields whose extractor fingerprint is unchanged.
+        Extractors reading the normalized view get normalized_text, which is computed here if not passed in.
+
+        Returns the extracted values together with the fingerprints of the extractors that produced them.
+        Fields that fell back to a default value get no fingerprint, so they are recomputed on reprocessing.
+        """
+        return self.extract_fields_batch_with_fingerprints(
+            [text], [previous_results], [previous_fingerprints],
+            None if normalized_text is None else [normalized_text])[0]
+
+    def extract_fields_batch_with_fingerprints(self, texts, previous_results_list=None, previous_fingerprints_list=None,
+                                               normalized_texts=None):
+        """
+        Batched version of extract_fields_with_fingerprints: every extractor gets all texts that need it in one call.
+        If a batch call fails, the texts are retried one by one so that a single bad text only affects itself.
+        """
+        previous_results_list = previous_results_list or [None] * len(texts)
+        previous_fingerprints_list = previous_fingerprints_list or [None] * len(texts)
+        if normalized_texts is None and any(extractor.text_view == NORMALIZED_TEXT_VIEW for extractor in self.extractors):
+            normalized_texts = [self.normalize_text(text) for text in texts]
+
+        batch_results = [{} for _ in texts]
+        batch_fingerprints = [{} for _ in texts]
+        reused_fields = []
         for extractor in self.extractors:
+            field_names = extractor.field_names
+            field_label = ', '.join(field_names)
+            fingerprint = self.fingerprint(extractor)
+            views = normalized_texts if extractor.text_view == NORMALIZED_TEXT_VIEW else texts
+
+            # Extractors of several fields are only skipped when all of their stored values are current
+            pending = []
+            for index in range(len(texts)):
+                previous_results = previous_results_list[index] or {}
+                previous_fingerprints = previous_fingerprints_list[index] or {}
+                if all(field_name in previous_results and previous_fingerprints.get(field_name) == fingerprint
+                       for field_name in field_names):
+                    for field_name in field_names:
+                        batch_results[index][field_name] = previous_results[field_name]
+                        batch_fingerprints[index][field_name] = fingerprint
+                    reused_fields.extend(field_names)
+                else:
+                    pending.append(index)
+            if not pending:
+                continue
+
             try:
-                extracted_data = extractor.extract_field(text)
-                results[extractor.field_name] = extracted_data
+                extracted_values = extractor.extract_fields_batch([views[index] for index in pending])
             except Exception as e:
-                logger.error(f"Error extracting field '{extractor.field_name}': {e}")
-                # Provide default values for failed extractions
-                if extractor.field_name == 'title':
-                    results[extractor.field_name] = "Не вдалося витягнути заголовок"
-                elif extractor.field_name == 'categories':
-                    results[extractor.field_name] = []
-                elif extractor.field_name == 'format':
-                    results[extractor.field_name] = 'офлайн'
-                elif extractor.field_name == 'asap':
-                    results[extractor.field_name] = False
-                else:
-                    results[extractor.field_name] = None
-        return results
+                errors = {index: e for index in pending}
+                if len(pending) > 1:
+                    logger.warning(f"Batch extraction of field '{field_label}' failed, retrying one by one: {e}")
+                    for index in pending:
+                        try:
+                            extracted_data = extractor.extract_fields(views[index])
+                        except Exception as item_error:
+                            errors[index] = item_error
+                        else:
+                            for field_name in field_names:
+                                batch_results[index][field_name] = extracted_data[field_name]
+                                batch_fingerprints[index][field_name] = fingerprint
+                            del errors[index]
+
+                for index, error in errors.items():
+                    logger.error(f"Error extracting field '{field_label}': {error}")
+                    # Provide default values for failed extractions
+                    for field_name in field_names:
+                        batch_results[index][field_name] = default_field_value(field_name)
+            else:
+                for index, extracted_data in zip(pending, extracted_values):
+                    for field_name in field_names:
+                        batch_results[index][field_name] = extracted_data[field_name]
+                        batch_fingerprints[index][field_name] = fingerprint
+
+        if reused_fields:
+            logger.info(f"Reused stored values for unchanged fields: {sorted(set(reused_fields))}")
+        return list(zip(batch_results, batch_fingerprints))
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DefaultIdempotencyService:
+    """
+    Local SQLite store of completed messages, so a message redelivered after its output was published (e.g. when the
+    ack was lost with the connection) is not extracted and published again. Entries are keyed by the message_id
+    (channel, post time and text hash) and the extractor fingerprints, so a message is processed again once the
+    extractors change, and expire after ttl_seconds.
+    """
+
+    def __init__(self, db_path, ttl_seconds, republish_duplicates=False):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.republish_duplicates = republish_duplicates
+        self.duplicates = 0
+        self.completed = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Opened on the main thread, used by the batch processing thread only afterwards
+        self.connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        # WAL keeps lookups cheap while another worker process on the same volume writes
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS completed_messages ("
+                                    "key TEXT PRIMARY KEY, completed_at REAL NOT NULL, result TEXT NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS completed_messages_completed_at "
+                                    "ON completed_messages (completed_at)")
+
+    @staticmethod
+    def key(message_id, fingerprints):
+        fingerprint_hash = hashlib.sha256(json.dumps(fingerprints, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        return f"{message_id}:{fingerprint_hash}"
+
+    def find_completed(self, message_ids, fingerprints):
+        """Return the stored results of the messages completed within the TTL, keyed by message_id"""
+        keys = {self.key(message_id, fingerprints): message_id for message_id in message_ids}
+        if not keys:
+            return {}
+        placeholders = ','.join('?' * len(keys))
+        rows = self.connection.execute(
+            f"SELECT key, result FROM completed_messages WHERE key IN ({placeholders}) AND completed_at >= ?",
+            [*keys, time.time() - self.ttl_seconds]).fetchall()
+        self.duplicates += len(rows)
+        return {keys[key]: json.loads(result) for key, result in rows}
+
+    def mark_completed(self, completed_messages, fingerprints):
+        """Record (message_id, published result dict) pairs, call only once their output is published"""
+        if not completed_messages:
+            return
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO completed_messages (key, completed_at, result) VALUES (?, ?, ?)",
+                [(self.key(message_id, fingerprints), now, json.dumps(result, ensure_ascii=False))
+                 for message_id, result in completed_messages])
+        self.completed += len(completed_messages)
+
+    def purge_expired(self):
+        """Delete the entries older than the TTL, returns how many were deleted"""
+        with self.connection:
+            deleted = self.connection.execute("DELETE FROM completed_messages WHERE completed_at < ?",
+                                              (time.time() - self.ttl_seconds,)).rowcount
+        if deleted:
+            logger.info(f"Purged {deleted} expired entries from the idempotency store.")
+        return deleted
+
+    def close(self):
+        self.connection.close()
+
+    def metrics(self):
+        return [
+            ("idempotency_duplicates_total", None, self.duplicates),
+            ("idempotency_completed_total", None, self.completed),
+        ]
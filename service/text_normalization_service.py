@@ -0,0 +1,61 @@
+import hashlib
+import re
+
+_URL_PATTERN = re.compile(r'(?:https?://|www\.|t\.me/)\S+', re.IGNORECASE)
+_MENTION_PATTERN = re.compile(r'(?<!\w)@\w+')
+_HASHTAG_PATTERN = re.compile(r'(?<!\w)#(\w+)')
+_EMOJI_PATTERN = re.compile(
+    '['
+    '\U0001F000-\U0001FAFF'  # pictographs, emoticons, transport, flags and extended pictographs
+    '\u2600-\u27BF'  # miscellaneous symbols and dingbats
+    '\u2B00-\u2BFF'  # arrows and stars
+    '\u2190-\u21FF'  # arrows
+    '\u2300-\u23FF'  # technical symbols (hourglass, watch)
+    '\u25A0-\u25FF'  # geometric shapes used as bullets
+    ']+'
+)
+_REPEATED_PUNCTUATION_PATTERN = re.compile(r'([!?.,;:\-\u2013\u2014_=*])\1+')
+_INLINE_WHITESPACE_PATTERN = re.compile(r'[^\S\n]+')
+_NEWLINES_PATTERN = re.compile(r'\s*\n\s*')
+
+# Soft hyphen, zero-width, joiner, word joiner, BOM, variation selectors, keycap and bidi formatting characters
+_FORMATTING_TABLE = str.maketrans('', '', ''.join([
+    '\u00ad', '\u200b', '\u200c', '\u200d', '\u200e', '\u200f', '\u2060', '\ufeff', '\ufe0e', '\ufe0f', '\u20e3',
+    *[chr(code) for code in range(0x202a, 0x202f)],
+    *[chr(code) for code in range(0x2066, 0x206a)]
+]))
+
+NORMALIZATION_STEPS = {
+    'urls': lambda text: _URL_PATTERN.sub(' ', text),
+    'mentions': lambda text: _MENTION_PATTERN.sub(' ', text),
+    'hashtags': lambda text: _HASHTAG_PATTERN.sub(r'\1', text),
+    'emojis': lambda text: _EMOJI_PATTERN.sub(' ', text),
+    'formatting': lambda text: text.translate(_FORMATTING_TABLE),
+    'punctuation': lambda text: _REPEATED_PUNCTUATION_PATTERN.sub(r'\1', text),
+    'whitespace': lambda text: _NEWLINES_PATTERN.sub('\n', _INLINE_WHITESPACE_PATTERN.sub(' ', text)).strip()
+}
+
+
+class DefaultTextNormalizationService:
+    """
+    Strips Telegram decorations (links, mentions, emojis, formatting characters, repeated punctuation and whitespace)
+    that only add tokenization and generation cost. The steps run in the configured order with precompiled patterns.
+    """
+
+    def __init__(self, steps):
+        unknown_steps = [step for step in steps if step not in NORMALIZATION_STEPS]
+        if unknown_steps:
+            raise ValueError(f"Unknown text normalization steps: {unknown_steps}, "
+                             f"available: {list(NORMALIZATION_STEPS)}")
+        self.steps = list(steps)
+        self._step_functions = [NORMALIZATION_STEPS[step] for step in self.steps]
+
+    def normalize(self, text):
+        for step_function in self._step_functions:
+            text = step_function(text)
+        return text
+
+    @property
+    def fingerprint(self):
+        """Return a short hash of the configured steps, part of the fingerprint of extractors using the normalized view."""
+        return hashlib.sha256(','.join(self.steps).encode('utf-8')).hexdigest()[:16]